@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+from typing import Any, Hashable, List, Optional, Union
+import orjson
+import redis
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# When set, shared caches live in Redis so every worker sees the same entries
+REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+# Prefix for every Redis key; bump the version to orphan entries with an old shape
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "v1:trackmate")
+# Seconds a Redis-backed entry is also kept in process memory
+L1_TTL = 5
+
+_redis_client: Optional[redis.Redis] = None
+
+# Every cache created here, so they can be cleared together
+_registry: List[Union["LocalCache", "RedisCache"]] = []
+
+
+class LocalCache:
+    """
+    Thread-safe in-process TTL cache.
+
+    Sync routes run in FastAPI's threadpool, so access to the underlying
+    cachetools cache is serialized with a lock.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._data: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCache:
+    """
+    Redis-backed TTL cache with the same interface as LocalCache.
+
+    Keys are stored under "<CACHE_KEY_PREFIX>:<namespace>:<key>" and values as
+    JSON, so only JSON-serializable values can be cached.
+    """
+
+    def __init__(self, client: redis.Redis, namespace: str, ttl: int):
+        self._client = client
+        self._namespace = f"{CACHE_KEY_PREFIX}:{namespace}"
+        self._ttl = ttl
+        _registry.append(self)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self._namespace}:{key}"
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        raw = self._client.get(self._key(key))
+        return orjson.loads(raw) if raw is not None else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._client.setex(self._key(key), self._ttl, orjson.dumps(value))
+
+    def delete(self, key: Hashable) -> None:
+        self._client.unlink(self._key(key))
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self._namespace}:*", count=500))
+        if keys:
+            self._client.unlink(*keys)
+
+
+class TieredCache:
+    """
+    A short-lived LocalCache (L1) in front of a RedisCache (L2).
+
+    Hot keys are answered from process memory without a Redis round-trip.
+    Deletes only reach this process's L1, so other workers may serve an
+    entry for up to the L1 TTL after it was invalidated.
+    """
+
+    def __init__(self, local: LocalCache, remote: RedisCache):
+        self._local = local
+        self._remote = remote
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._local.get(key)
+        if value is None:
+            value = self._remote.get(key)
+            if value is not None:
+                self._local.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._remote.set(key, value)
+        self._local.set(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        self._remote.delete(key)
+        self._local.delete(key)
+
+    def clear(self) -> None:
+        self._remote.clear()
+        self._local.clear()
+
+
+def shared_cache(namespace: str, maxsize: int, ttl: int) -> Union[LocalCache, TieredCache]:
+    """
+    Create a cache for JSON-serializable values.
+
+    Uses Redis behind a small in-process L1 when REDIS_URL is configured,
+    otherwise an in-process LocalCache.
+    """
+    global _redis_client
+    if not REDIS_URL:
+        return LocalCache(maxsize=maxsize, ttl=ttl)
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(REDIS_URL)
+    local = LocalCache(maxsize=maxsize, ttl=min(ttl, L1_TTL))
+    return TieredCache(local, RedisCache(_redis_client, namespace, ttl))
+
+
+def make_key(params: dict) -> str:
+    """Build a stable cache key from a dict of query parameters."""
+    return hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def clear_all() -> None:
+    """Empty every cache."""
+    for cache in _registry:
+        cache.clear()
@@ -1,9 +1,33 @@
-from sqlmodel import Session, select, and_, or_, func
-from sqlalchemy import desc
+from sqlmodel import Session, select, and_, or_, func, col
+from sqlalchemy import desc, case, exists, insert, update, delete, lambda_stmt
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlalchemy.orm import joinedload, selectinload, make_transient_to_detached
 from app import models, schemas
-from typing import List, Optional, Dict, Any, cast
+from app.cache import LocalCache, shared_cache
+from typing import Collection, List, Optional, Dict, Any, Tuple
 from datetime import date as Date, datetime, timedelta
 
+# Upper bound on a single page of filtered listings
+MAX_PAGE_SIZE = 100
+
+# Columns behind ItemRead/ClaimRead, for listings that skip ORM hydration
+ITEM_READ_COLUMNS = (
+    models.Item.id, models.Item.name, models.Item.description, models.Item.item_type,
+    models.Item.location, models.Item.date, models.Item.image_url, models.Item.status,
+    models.Item.owner_id, models.Item.created_at, models.Item.updated_at,
+)
+CLAIM_READ_COLUMNS = (
+    models.Claim.id, models.Claim.item_id, models.Claim.claimer_id, models.Claim.message,
+    models.Claim.status, models.Claim.created_at, models.Claim.updated_at,
+)
+
+# Login bursts re-probe the same email; keep found users briefly
+user_by_email_cache = LocalCache(maxsize=10_000, ttl=5)
+# Dashboard statistics; dropped on writes, so the TTL only bounds drift from bulk changes
+stats_cache = shared_cache("stats", maxsize=8, ttl=60)
+# Location distribution shifts slowly; not invalidated on item writes
+top_locations_cache = shared_cache("stats:locations", maxsize=1, ttl=60)
+
 
 # ---------- USER CRUD ----------
 def create_user(session: Session, user: schemas.UserCreate, password_hash: str) -> models.User:
@@ -11,11 +35,10 @@ def create_user(session: Session, user: schemas.UserCreate, password_hash: str)
         name=user.name,
         email=user.email,
         password_hash=password_hash,
-        role=user.role if hasattr(user, "role") else "user"  # default role
+        role=user.role or "user"  # default role
     )
     session.add(db_user)
     session.commit()
-    session.refresh(db_user)
     return db_user
 
 
@@ -24,9 +47,33 @@ def get_user_by_email(session: Session, email: str) -> Optional[models.User]:
     return session.exec(statement).first()
 
 
+def get_user_by_email_cached(session: Session, email: str) -> Optional[models.User]:
+    """Like get_user_by_email, but serves recently seen users from user_by_email_cache."""
+    cached = user_by_email_cache.get(email)
+    if cached is not None:
+        return session.merge(cached, load=False)
+
+    user = get_user_by_email(session, email)
+    if user is not None:
+        user_by_email_cache.set(email, detached_user_copy(user))
+    return user
+
+
 def get_user_by_id(session: Session, user_id: int) -> Optional[models.User]:
-    statement = select(models.User).where(models.User.id == user_id)
-    return session.exec(statement).first()
+    # Checks the session identity map before querying
+    return session.get(models.User, user_id)
+
+
+def detached_user_copy(user: models.User) -> models.User:
+    """
+    Copy a user into a detached instance that is safe to cache across sessions.
+
+    Attach it to a session with session.merge(copy, load=False), which does not
+    query the database.
+    """
+    copy = models.User(**user.model_dump())
+    make_transient_to_detached(copy)
+    return copy
 
 
 # ---------- ITEM CRUD ----------
@@ -34,80 +81,122 @@ def create_item(session: Session, item: schemas.ItemCreate, owner_id: int) -> mo
     db_item = models.Item(**item.model_dump(), owner_id=owner_id)
     session.add(db_item)
     session.commit()
-    session.refresh(db_item)
     return db_item
 
 
-def get_items(session: Session) -> List[models.Item]:
-    statement = select(models.Item)
-    return session.exec(statement).all()
+def bulk_create_items(session: Session, items: List[schemas.ItemCreate], owner_id: int) -> int:
+    """Create many items for one owner with a single batched INSERT."""
+    if not items:
+        return 0
+    rows = [{**item.model_dump(), "owner_id": owner_id} for item in items]
+    session.exec(insert(models.Item), params=rows)
+    session.commit()
+    return len(rows)
 
 
-def get_items_with_filters(session: Session, filters: Dict[str, Any]) -> List[models.Item]:
-    """
-    Get items with comprehensive filtering support.
-    
-    Args:
-        session: Database session
-        filters: Dictionary containing filter parameters
-            - item_type: Filter by 'lost' or 'found'
-            - location: Filter by location
-            - date_from: Filter items from this date
-            - date_to: Filter items until this date
-            - status: Filter by status
-            - owner_id: Filter by owner
-            - search: Search in name and description
-            - limit: Number of items to return
-            - offset: Number of items to skip
-    """
-    statement = select(models.Item)
+def get_items(session: Session) -> List[models.Item]:
+    return list(session.exec(select(models.Item)))
+
+
+def _filter_items(statement: StatementLambdaElement, filters: Dict[str, Any]) -> StatementLambdaElement:
+    """Append the listing filters, ordering and pagination to an item query."""
+    item_type = filters.get("item_type")
+    location = filters.get("location")
+    date_from = filters.get("date_from")
+    date_to = filters.get("date_to")
+    status = filters.get("status")
+    owner_id = filters.get("owner_id")
+    search = filters.get("search")
+    cursor = filters.get("cursor")
+    limit = min(filters.get("limit") or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    offset = filters.get("offset")
     
     # Apply filters
-    conditions = []
+    if item_type:
+        statement += lambda s: s.where(models.Item.item_type == item_type)
     
-    if filters.get("item_type"):
-        conditions.append(models.Item.item_type == filters["item_type"])
+    if location:
+        location_term = f"%{location}%"
+        statement += lambda s: s.where(col(models.Item.location).ilike(location_term))
     
-    if filters.get("location"):
-        conditions.append(cast(Any, models.Item.location).ilike(f"%{filters['location']}%"))
+    if date_from:
+        statement += lambda s: s.where(models.Item.date >= date_from)
     
-    if filters.get("date_from"):
-        conditions.append(models.Item.date >= filters["date_from"])
+    if date_to:
+        statement += lambda s: s.where(models.Item.date <= date_to)
     
-    if filters.get("date_to"):
-        conditions.append(models.Item.date <= filters["date_to"])
+    if status:
+        statement += lambda s: s.where(models.Item.status == status)
     
-    if filters.get("status"):
-        conditions.append(models.Item.status == filters["status"])
+    if owner_id:
+        statement += lambda s: s.where(models.Item.owner_id == owner_id)
     
-    if filters.get("owner_id"):
-        conditions.append(models.Item.owner_id == filters["owner_id"])
+    if search:
+        search_term = f"%{search}%"
+        statement += lambda s: s.where(
+            or_(
+                col(models.Item.name).ilike(search_term),
+                col(models.Item.description).ilike(search_term)
+            )
+        )
     
-    if filters.get("search"):
-        search_term = f"%{filters['search']}%"
-        conditions.append(
+    # Keyset pagination: rows strictly after the (date, id) of the previous page's last row
+    if cursor:
+        cursor_date, cursor_id = cursor
+        statement += lambda s: s.where(
             or_(
-                cast(Any, models.Item.name).ilike(search_term),
-                cast(Any, models.Item.description).ilike(search_term)
+                models.Item.date < cursor_date,
+                and_(models.Item.date == cursor_date, col(models.Item.id) < cursor_id)
             )
         )
     
-    # Apply all conditions
-    if conditions:
-        statement = statement.where(and_(*conditions))
+    # Order by most recent first (id breaks ties); pagination is always bounded
+    statement += lambda s: s.order_by(desc(col(models.Item.date)), desc(col(models.Item.id))).limit(limit)
     
-    # Order by most recent first
-    statement = statement.order_by(desc(cast(Any, models.Item.date)))
+    if offset:
+        statement += lambda s: s.offset(offset)
     
-    # Apply pagination
-    if filters.get("limit"):
-        statement = statement.limit(filters["limit"])
+    return statement
+
+
+def get_items_with_filters(session: Session, filters: Dict[str, Any], load_owner: bool = False) -> List[models.Item]:
+    """
+    Get items with comprehensive filtering support.
     
-    if filters.get("offset"):
-        statement = statement.offset(filters["offset"])
+    Args:
+        session: Database session
+        filters: Dictionary containing filter parameters
+            - item_type: Filter by 'lost' or 'found'
+            - location: Filter by location
+            - date_from: Filter items from this date
+            - date_to: Filter items until this date
+            - status: Filter by status
+            - owner_id: Filter by owner
+            - search: Search in name and description
+            - cursor: (date, id) of the last item on the previous page
+            - limit: Number of items to return (capped at MAX_PAGE_SIZE)
+            - offset: Number of items to skip
+        load_owner: Eager-load each item's owner in one extra IN query
     
-    results = session.exec(statement).all()
-    return list(results)
+    The statement is built with lambda_stmt so each filter combination is
+    compiled once and then served from SQLAlchemy's statement cache; filter
+    values captured by the lambdas become bound parameters.
+    """
+    statement = lambda_stmt(lambda: select(models.Item))
+    if load_owner:
+        statement += lambda s: s.options(selectinload(col(models.Item.owner)))
+    return list(session.scalars(_filter_items(statement, filters)))
+
+
+def list_items_dto(session: Session, filters: Dict[str, Any]) -> List[schemas.ItemRead]:
+    """
+    Like get_items_with_filters, but select only ItemRead's columns and build
+    the response models straight from the rows, skipping ORM hydration and
+    validation.
+    """
+    statement = lambda_stmt(lambda: select(*ITEM_READ_COLUMNS))
+    rows = session.execute(_filter_items(statement, filters))
+    return [schemas.ItemRead.from_row_fast(row) for row in rows]
 
 
 def get_item_by_id(session: Session, item_id: int) -> Optional[models.Item]:
@@ -124,103 +213,97 @@ def update_item(session: Session, db_item: models.Item, item_data: schemas.ItemU
     return db_item
 
 
+def is_image_referenced(session: Session, image_url: str) -> bool:
+    """Check whether any item points at the given stored image."""
+    return bool(session.exec(select(exists().where(models.Item.image_url == image_url))).one())
+
+
 def delete_item(session: Session, db_item: models.Item):
     session.delete(db_item)
     session.commit()
 
 
-def get_items_statistics(session: Session) -> Dict[str, Any]:
-    """Get comprehensive statistics about items in the system."""
-    
-    # Total items count
-    total_items = session.exec(select(func.count()).select_from(models.Item)).first()
-    
-    # Count by type
-    lost_count = session.exec(
-        select(func.count()).select_from(models.Item).where(models.Item.item_type == "lost")
-    ).first()
-    
-    found_count = session.exec(
-        select(func.count()).select_from(models.Item).where(models.Item.item_type == "found")
-    ).first()
-    
-    # Count by status (if you have status field)
-    try:
-        active_count = session.exec(
-            select(func.count()).select_from(models.Item).where(models.Item.status == "active")
-        ).first()
-        claimed_count = session.exec(
-            select(func.count()).select_from(models.Item).where(models.Item.status == "claimed")
-        ).first()
-        returned_count = session.exec(
-            select(func.count()).select_from(models.Item).where(models.Item.status == "returned")
-        ).first()
-    except AttributeError:
-        # If status field doesn't exist, set to None
-        active_count = None
-        claimed_count = None
-        returned_count = None
-    
-    # Most common locations
+def get_items_statistics(session: Session, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Get comprehensive statistics about items in the system (cached for 60s).
+
+    Pass refresh=True to recompute and re-cache even if a cached copy exists.
+    """
+    cached = None if refresh else stats_cache.get("items")
+    if cached is not None:
+        return cached
+    
+    # Type/status/recent counts in a single pass over the item table.
+    # MySQL returns SUM() as Decimal; int() keeps the dict JSON-serializable for Redis
+    thirty_days_ago = datetime.now().date() - timedelta(days=30)
+    counts = session.exec(
+        select(
+            func.count().label("total"),
+            func.sum(case((models.Item.item_type == "lost", 1), else_=0)).label("lost"),
+            func.sum(case((models.Item.item_type == "found", 1), else_=0)).label("found"),
+            func.sum(case((models.Item.status == "active", 1), else_=0)).label("active"),
+            func.sum(case((models.Item.status == "claimed", 1), else_=0)).label("claimed"),
+            func.sum(case((models.Item.status == "returned", 1), else_=0)).label("returned"),
+            func.sum(case((models.Item.date >= thirty_days_ago, 1), else_=0)).label("recent"),
+        ).select_from(models.Item)
+    ).one()
+    
+    stats = {
+        "total_items": int(counts.total or 0),
+        "lost_items": int(counts.lost or 0),
+        "found_items": int(counts.found or 0),
+        "active_items": int(counts.active or 0),
+        "claimed_items": int(counts.claimed or 0),
+        "returned_items": int(counts.returned or 0),
+        "recent_items_30_days": int(counts.recent or 0),
+        "top_locations": get_top_locations(session)
+    }
+    stats_cache.set("items", stats)
+    return stats
+
+
+def get_top_locations(session: Session, limit: int = 5) -> List[Dict[str, Any]]:
+    """Get the most common item locations (cached for 60s)."""
+    cached = top_locations_cache.get(limit)
+    if cached is not None:
+        return cached
+    
     location_stats = session.exec(
         select(models.Item.location, func.count().label('count'))
         .select_from(models.Item)
         .group_by(models.Item.location)
         .order_by(desc('count'))
-        .limit(5)
+        .limit(limit)
     ).all()
     
-    # Recent activity (last 30 days)
-    thirty_days_ago = datetime.now().date() - timedelta(days=30)
-    recent_items = session.exec(
-        select(func.count()).select_from(models.Item).where(models.Item.date >= thirty_days_ago)
-    ).first()
-    
-    return {
-        "total_items": total_items or 0,
-        "lost_items": lost_count or 0,
-        "found_items": found_count or 0,
-        "active_items": active_count,
-        "claimed_items": claimed_count,
-        "returned_items": returned_count,
-        "recent_items_30_days": recent_items or 0,
-        "top_locations": [{"location": loc, "count": count} for loc, count in location_stats] if location_stats else []
-    }
+    top_locations = [{"location": loc, "count": count} for loc, count in location_stats]
+    top_locations_cache.set(limit, top_locations)
+    return top_locations
 
 
-def bulk_update_item_status(session: Session, item_ids: List[int], new_status: str) -> int:
-    """Bulk update status for multiple items."""
-    try:
-        # Get all items with the given IDs
-        statement = select(models.Item).where(cast(Any, models.Item.id).in_(item_ids))
-        items_to_update = session.exec(statement).all()
-        
-        updated_count = 0
-        for item in items_to_update:
-            item.status = new_status
-            session.add(item)
-            updated_count += 1
-        
-        session.commit()
-        return updated_count
-    
-    except AttributeError:
-        # If status field doesn't exist in your model, raise an error
-        raise ValueError("Status field not found in Item model")
+def bulk_update_item_status(session: Session, item_ids: Collection[int], new_status: str) -> int:
+    """Bulk update status for multiple items with a single UPDATE statement."""
+    statement = (
+        update(models.Item)
+        .where(col(models.Item.id).in_(item_ids))
+        .values(status=new_status, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    result = session.exec(statement)
+    session.commit()
+    return result.rowcount
 
 
-def bulk_delete_items(session: Session, item_ids: List[int]) -> int:
-    """Bulk delete multiple items."""
-    statement = select(models.Item).where(models.Item.id.in_(item_ids))
-    items_to_delete = session.exec(statement).all()
-    
-    deleted_count = 0
-    for item in items_to_delete:
-        session.delete(item)
-        deleted_count += 1
-    
+def bulk_delete_items(session: Session, item_ids: Collection[int]) -> int:
+    """Bulk delete multiple items with a single DELETE statement."""
+    statement = (
+        delete(models.Item)
+        .where(col(models.Item.id).in_(item_ids))
+        .execution_options(synchronize_session=False)
+    )
+    result = session.exec(statement)
     session.commit()
-    return deleted_count
+    return result.rowcount
 
 
 # ---------- CLAIM CRUD ----------
@@ -228,164 +311,205 @@ def create_claim(session: Session, claim: schemas.ClaimCreate, claimer_id: int)
     db_claim = models.Claim(**claim.model_dump(), claimer_id=claimer_id)
     session.add(db_claim)
     session.commit()
-    session.refresh(db_claim)
     return db_claim
 
 
+def get_item_and_claim_exists(session: Session, item_id: int, user_id: int) -> Tuple[Optional[models.Item], bool]:
+    """
+    Fetch an item and whether the user has already claimed it, in one query.
+
+    Returns (None, False) when the item does not exist.
+    """
+    claim_exists = exists().where(models.Claim.item_id == item_id, models.Claim.claimer_id == user_id)
+    row = session.exec(select(models.Item, claim_exists).where(models.Item.id == item_id)).first()
+    if row is None:
+        return None, False
+    return row[0], bool(row[1])
+
+
 def get_claims_for_item(session: Session, item_id: int) -> List[models.Claim]:
     statement = select(models.Claim).where(models.Claim.item_id == item_id)
-    results = session.exec(statement).all()
-    return list(results)
+    return list(session.exec(statement))
 
 
 def get_claims_by_user(session: Session, user_id: int) -> List[models.Claim]:
     """Get all claims made by a specific user."""
     statement = select(models.Claim).where(models.Claim.claimer_id == user_id)
-    results = session.exec(statement).all()
-    return list(results)
+    return list(session.exec(statement))
 
 
 def get_claim_by_id(session: Session, claim_id: int) -> Optional[models.Claim]:
-    """Get a specific claim by ID."""
-    statement = select(models.Claim).where(models.Claim.id == claim_id)
+    """Get a specific claim by ID, with its item loaded in the same query."""
+    statement = (
+        select(models.Claim)
+        .options(joinedload(col(models.Claim.item)))
+        .where(models.Claim.id == claim_id)
+    )
     return session.exec(statement).first()
 
 
-def get_claims_with_filters(session: Session, filters: Dict[str, Any]) -> List[models.Claim]:
-    """Get claims with comprehensive filtering support."""
-    statement = select(models.Claim)
+def _filter_claims(statement: StatementLambdaElement, filters: Dict[str, Any]) -> StatementLambdaElement:
+    """Append the listing filters, ordering and pagination to a claim query."""
+    status = filters.get("status")
+    item_type = filters.get("item_type")
+    user_id = filters.get("user_id")
+    visible_to = filters.get("visible_to")
+    cursor = filters.get("cursor")
+    limit = min(filters.get("limit") or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+    offset = filters.get("offset")
+    
+    # Join with items table to filter by item type or owner
+    if item_type or visible_to:
+        statement += lambda s: s.join(models.Item, col(models.Claim.item_id) == col(models.Item.id))
+    
+    # Regular users see claims they made plus claims on items they own
+    if visible_to:
+        statement += lambda s: s.where(
+            or_(models.Claim.claimer_id == visible_to, models.Item.owner_id == visible_to)
+        )
     
     # Apply filters
-    conditions = []
+    if status:
+        statement += lambda s: s.where(models.Claim.status == status)
     
-    if filters.get("status"):
-        conditions.append(models.Claim.status == filters["status"])
-    
-    if filters.get("item_type"):
-        # Join with items table to filter by item type
-        statement = statement.join(models.Item, cast(Any, (models.Claim.item_id == models.Item.id)))
-        conditions.append(models.Item.item_type == filters["item_type"])
-    
-    if filters.get("user_id"):
-        conditions.append(models.Claim.claimer_id == filters["user_id"])
+    if item_type:
+        statement += lambda s: s.where(models.Item.item_type == item_type)
     
-    # Apply all conditions
-    if conditions:
-        statement = statement.where(and_(*conditions))
+    if user_id:
+        statement += lambda s: s.where(models.Claim.claimer_id == user_id)
     
-    # Order by most recent first
-    statement = statement.order_by(desc(cast(Any, models.Claim.created_at)))
+    # Keyset pagination on (created_at, id), matching the sort order
+    if cursor:
+        cursor_created, cursor_id = cursor
+        statement += lambda s: s.where(
+            or_(
+                col(models.Claim.created_at) < cursor_created,
+                and_(col(models.Claim.created_at) == cursor_created, col(models.Claim.id) < cursor_id)
+            )
+        )
     
-    # Apply pagination
-    if filters.get("limit"):
-        statement = statement.limit(filters["limit"])
+    # Order by most recent first; pagination is always bounded
+    statement += lambda s: s.order_by(
+        desc(col(models.Claim.created_at)), desc(col(models.Claim.id))
+    ).limit(limit)
     
-    if filters.get("offset"):
-        statement = statement.offset(filters["offset"])
+    if offset:
+        statement += lambda s: s.offset(offset)
     
-    results = session.exec(statement).all()
-    return list(results)
+    return statement
+
 
+def get_claims_with_filters(session: Session, filters: Dict[str, Any], load_relations: bool = False) -> List[models.Claim]:
+    """
+    Get claims with comprehensive filtering support.
+
+    Filters: status, item_type, user_id (claimer), visible_to (claimer or item
+    owner), cursor ((created_at, id) of the previous page's
+    last claim), limit (capped at MAX_PAGE_SIZE) and offset.
 
-def update_claim_status(session: Session, claim_id: int, status: str) -> Optional[models.Claim]:
+    When load_relations is True, each claim's item and claimer are eager-loaded
+    with one IN query per relationship instead of one query per claim.
+    """
+    statement = lambda_stmt(lambda: select(models.Claim))
+    if load_relations:
+        statement += lambda s: s.options(
+            selectinload(col(models.Claim.item)),
+            selectinload(col(models.Claim.claimer)),
+        )
+    return list(session.scalars(_filter_claims(statement, filters)))
+
+
+def list_claims_dto(session: Session, filters: Dict[str, Any]) -> List[schemas.ClaimRead]:
+    """
+    Like get_claims_with_filters, but select only ClaimRead's columns and build
+    the response models straight from the rows, skipping ORM hydration and
+    validation.
+    """
+    statement = lambda_stmt(lambda: select(*CLAIM_READ_COLUMNS))
+    rows = session.execute(_filter_claims(statement, filters))
+    return [schemas.ClaimRead.from_row_fast(row) for row in rows]
+
+
+def list_claims(session: Session, viewer: schemas.CurrentUser, filters: Dict[str, Any]) -> List[schemas.ClaimRead]:
+    """
+    List the claims a viewer may see, as response models.
+
+    Admins see every claim (only their own with my_claims); regular users see
+    claims they made plus claims on items they own. Remaining filters are
+    the same as for get_claims_with_filters.
+    """
+    filters = dict(filters)
+    my_claims = filters.pop("my_claims", False)
+    if viewer.role == "admin":
+        filters["user_id"] = viewer.id if my_claims else None
+    else:
+        filters["visible_to"] = viewer.id
+    return list_claims_dto(session, filters)
+
+
+def update_claim_status(session: Session, db_claim: models.Claim, status: str) -> models.Claim:
     """Update claim status."""
-    db_claim = get_claim_by_id(session, claim_id)
-    if db_claim:
-        try:
-            db_claim.status = status
-            # Update timestamp if field exists
-            if hasattr(db_claim, 'updated_at'):
-                db_claim.updated_at = datetime.utcnow()
-            session.add(db_claim)
-            session.commit()
-            session.refresh(db_claim)
-            return db_claim
-        except AttributeError:
-            # If status field doesn't exist in Claim model
-            raise ValueError("Status field not found in Claim model")
-    return None
-
-
-def delete_claim(session: Session, claim_id: int) -> bool:
+    # updated_at is stamped by the database (onupdate=func.now())
+    db_claim.status = status
+    session.add(db_claim)
+    session.commit()
+    session.refresh(db_claim)
+    return db_claim
+
+
+def delete_claim(session: Session, db_claim: models.Claim):
     """Delete a claim."""
-    db_claim = get_claim_by_id(session, claim_id)
-    if db_claim:
-        session.delete(db_claim)
-        session.commit()
-        return True
-    return False
-
-
-def get_claims_statistics(session: Session) -> Dict[str, Any]:
-    """Get comprehensive statistics about claims in the system."""
-    
-    # Total claims count
-    total_claims = session.exec(select(func.count()).select_from(models.Claim)).first()
-    
-    # Count by status (if you have status field)
-    try:
-        pending_claims = session.exec(
-            select(func.count()).select_from(models.Claim).where(models.Claim.status == "pending")
-        ).first()
-        approved_claims = session.exec(
-            select(func.count()).select_from(models.Claim).where(models.Claim.status == "approved")
-        ).first()
-        rejected_claims = session.exec(
-            select(func.count()).select_from(models.Claim).where(models.Claim.status == "rejected")
-        ).first()
-        completed_claims = session.exec(
-            select(func.count()).select_from(models.Claim).where(models.Claim.status == "completed")
-        ).first()
-    except AttributeError:
-        # If status field doesn't exist, set to None
-        pending_claims = None
-        approved_claims = None
-        rejected_claims = None
-        completed_claims = None
-    
-    # Recent activity (last 30 days)
+    session.delete(db_claim)
+    session.commit()
+
+
+def get_claims_statistics(session: Session, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Get comprehensive statistics about claims in the system (cached for 60s).
+
+    Pass refresh=True to recompute and re-cache even if a cached copy exists.
+    """
+    cached = None if refresh else stats_cache.get("claims")
+    if cached is not None:
+        return cached
+    
+    # Status/recent counts in a single pass over the claim table
     thirty_days_ago = datetime.now() - timedelta(days=30)
-    try:
-        claims_this_month = session.exec(
-            select(func.count()).select_from(models.Claim).where(models.Claim.created_at >= thirty_days_ago)
-        ).first()
-    except AttributeError:
-        # If created_at field doesn't exist, set to 0
-        claims_this_month = 0
-    
-    return {
-        "total_claims": total_claims or 0,
-        "pending_claims": pending_claims,
-        "approved_claims": approved_claims,
-        "rejected_claims": rejected_claims,
-        "completed_claims": completed_claims,
-        "claims_this_month": claims_this_month or 0,
+    counts = session.exec(
+        select(
+            func.count().label("total"),
+            func.sum(case((models.Claim.status == "pending", 1), else_=0)).label("pending"),
+            func.sum(case((models.Claim.status == "approved", 1), else_=0)).label("approved"),
+            func.sum(case((models.Claim.status == "rejected", 1), else_=0)).label("rejected"),
+            func.sum(case((models.Claim.status == "completed", 1), else_=0)).label("completed"),
+            func.sum(case((models.Claim.created_at >= thirty_days_ago, 1), else_=0)).label("recent"),
+        ).select_from(models.Claim)
+    ).one()
+    
+    stats = {
+        "total_claims": int(counts.total or 0),
+        "pending_claims": int(counts.pending or 0),
+        "approved_claims": int(counts.approved or 0),
+        "rejected_claims": int(counts.rejected or 0),
+        "completed_claims": int(counts.completed or 0),
+        "claims_this_month": int(counts.recent or 0),
         "average_response_time_hours": None  # You can implement this later
     }
+    stats_cache.set("claims", stats)
+    return stats
 
 
-def bulk_update_claims_status(session: Session, claim_ids: List[int], new_status: str) -> int:
-    """Bulk update status for multiple claims."""
-    try:
-        # Get all claims with the given IDs
-        statement = select(models.Claim).where(cast(Any, models.Claim.id).in_(claim_ids))
-        claims_to_update = session.exec(statement).all()
-        
-        updated_count = 0
-        for claim in claims_to_update:
-            claim.status = new_status
-            # Update timestamp if field exists
-            if hasattr(claim, 'updated_at'):
-                claim.updated_at = datetime.utcnow()
-            session.add(claim)
-            updated_count += 1
-        
-        session.commit()
-        return updated_count
-    
-    except AttributeError:
-        # If status field doesn't exist in your model, raise an error
-        raise ValueError("Status field not found in Claim model")
+def bulk_update_claims_status(session: Session, claim_ids: Collection[int], new_status: str) -> int:
+    """Bulk update status for multiple claims with a single UPDATE statement."""
+    statement = (
+        update(models.Claim)
+        .where(col(models.Claim.id).in_(claim_ids))
+        .values(status=new_status, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    result = session.exec(statement)
+    session.commit()
+    return result.rowcount
 
 
 # ---------- ADVANCED SEARCH FUNCTIONS ----------
@@ -411,16 +535,26 @@ def search_similar_items(session: Session, item_id: int, similarity_threshold: f
             models.Item.id != item_id
         )
     )
-    
+
+    # A positive similarity needs at least one shared word, so let the database
+    # discard items that mention none of the reference words
+    if similarity_threshold > 0 and reference_words:
+        word_matches = []
+        for word in reference_words:
+            # autoescape keeps %, _ and the escape character in a word literal
+            word_matches.append(col(models.Item.name).icontains(word, autoescape=True))
+            word_matches.append(col(models.Item.description).icontains(word, autoescape=True))
+        statement = statement.where(or_(*word_matches))
+
     potential_matches = session.exec(statement).all()
     similar_items = []
     
     for item in potential_matches:
-        item_words = set(item.name.lower().split() + item.description.lower().split())
+        item_words = set(f"{item.name} {item.description}".lower().split())
         
-        # Calculate simple Jaccard similarity
-        intersection = len(reference_words.intersection(item_words))
-        union = len(reference_words.union(item_words))
+        # Calculate simple Jaccard similarity: |A & B| / (|A| + |B| - |A & B|)
+        intersection = len(item_words & reference_words)
+        union = len(reference_words) + len(item_words) - intersection
         
         if union > 0:
             similarity = intersection / union
@@ -442,5 +576,5 @@ def get_items_by_date_range(session: Session, start_date: Date, end_date: Date,
     if item_type:
         statement = statement.where(models.Item.item_type == item_type)
     
-    results = session.exec(statement.order_by(desc(cast(Any, models.Item.date)))).all()
+    results = session.exec(statement.order_by(desc(col(models.Item.date)))).all()
     return list(results)
@@ -1,21 +1,121 @@
 import os
+import time
+import logging
+from collections import Counter
+from contextvars import ContextVar
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event, text
+from sqlalchemy.pool import StaticPool
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Dict, Any
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Pool configuration (override via environment)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 25))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 25))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))  # seconds; keep below MySQL's wait_timeout
+DB_INSERT_PAGE_SIZE = 1000  # rows per batched multi-row INSERT
+# Worker threads for sync routes; matching the pool keeps threads from queueing on checkout
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+DB_ECHO = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+# Slow-query and repeated-query (N+1) logging
+DB_QUERY_LOG_ENABLED = os.getenv("DB_QUERY_LOG_ENABLED", "false").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 50))
+
+# Statement -> execution count for the current request (set by middleware)
+request_statement_counts: ContextVar[Optional[Counter]] = ContextVar("request_statement_counts", default=None)
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Build create_engine keyword arguments for the given database URL."""
+    options: Dict[str, Any] = {
+        "echo": DB_ECHO,
+        "pool_pre_ping": True,
+        "insertmanyvalues_page_size": DB_INSERT_PAGE_SIZE,
+    }
+
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases only exist on a single connection
+        if ":memory:" in url or "mode=memory" in url or url.rstrip("/") == "sqlite:":
+            options["poolclass"] = StaticPool
+            return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers proceed alongside a single writer
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        cursor.close()
+
+
+def install_query_logging(target_engine) -> None:
+    """Log statements slower than DB_SLOW_QUERY_MS and count statements per request."""
+
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _log_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._query_start) * 1000
+        if elapsed_ms > DB_SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {statement} | params={parameters!r}")
+
+        counts = request_statement_counts.get()
+        if counts is not None:
+            counts[statement] += 1
+
+
+if DB_QUERY_LOG_ENABLED:
+    install_query_logging(engine)
 
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
 
+def warm_pool():
+    """Open the pool's connections up front so early requests skip the connect handshake."""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    connections = []
+    try:
+        for _ in range(size):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        # Closing returns the connections to the pool, where they stay open
+        for connection in connections:
+            connection.close()
+
+
 def get_session():
-    with Session(engine) as session:
+    # Objects keep their loaded state after commit; inserts already carry their
+    # primary key and Python-side defaults, so no reload query is needed
+    with Session(engine, expire_on_commit=False) as session:
         yield session
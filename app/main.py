@@ -1,18 +1,65 @@
-from fastapi import FastAPI
+import os
+import asyncio
+import logging
+from collections import Counter
+import anyio.to_thread
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from sqlmodel import Session
+from app import crud, database
 from app.routes import items, claims, auth
-from app.database import create_db_and_tables
+from app.pagination import NEXT_CURSOR_HEADER
+from app.database import (
+    create_db_and_tables,
+    warm_pool,
+    THREADPOOL_SIZE,
+    DB_QUERY_LOG_ENABLED,
+    request_statement_counts,
+)
+
+logger = logging.getLogger(__name__)
+
+# A statement repeated this many times in one request is likely an N+1 pattern
+REPEATED_QUERY_THRESHOLD = 3
+
+# Seconds between background statistics refreshes; 0 disables prewarming
+STATS_PREWARM_INTERVAL = int(os.getenv("STATS_PREWARM_INTERVAL", 0))
+
+
+def refresh_statistics() -> None:
+    """Recompute the dashboard statistics so requests are served from the cache."""
+    with Session(database.engine, expire_on_commit=False) as session:
+        crud.get_items_statistics(session, refresh=True)
+        crud.get_claims_statistics(session, refresh=True)
+
+
+async def prewarm_statistics(interval: int) -> None:
+    while True:
+        try:
+            await anyio.to_thread.run_sync(refresh_statistics)
+        except Exception as e:
+            logger.warning(f"Failed to refresh statistics cache: {str(e)}")
+        await asyncio.sleep(interval)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Sync routes and dependencies run in anyio's threadpool (40 threads by default)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     create_db_and_tables()
+    warm_pool()
+    prewarm_task = None
+    if STATS_PREWARM_INTERVAL > 0:
+        prewarm_task = asyncio.create_task(prewarm_statistics(STATS_PREWARM_INTERVAL))
     yield
     # Shutdown
-    pass
+    if prewarm_task:
+        prewarm_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await prewarm_task
 
 
 app = FastAPI(title="TrackMate API", version="1.0", lifespan=lifespan)
@@ -29,8 +76,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the frontend read the cursor for the next page of a listing
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+if DB_QUERY_LOG_ENABLED:
+    @app.middleware("http")
+    async def detect_repeated_queries(request: Request, call_next):
+        counts: Counter = Counter()
+        token = request_statement_counts.set(counts)
+        try:
+            response = await call_next(request)
+        finally:
+            request_statement_counts.reset(token)
+
+        for statement, count in counts.items():
+            if count >= REPEATED_QUERY_THRESHOLD:
+                logger.warning(
+                    f"Possible N+1: statement ran {count} times in {request.method} {request.url.path}: {statement}"
+                )
+        return response
+
 # Mount static folder for serving uploaded images
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
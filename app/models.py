@@ -1,13 +1,13 @@
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, String, DateTime, text
+from sqlalchemy import Column, String, DateTime, Index, UniqueConstraint, func, text
 from datetime import datetime, date
 
 # ---------- USER MODEL ----------
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(max_length=255)
-    email: str = Field(max_length=255)
+    email: str = Field(sa_column=Column(String(255), unique=True, index=True, nullable=False))
     password_hash: str = Field(max_length=255)
     role: str = Field(default="user", max_length=50)  # "user" or "admin"
     created_at: datetime = Field(
@@ -15,12 +15,21 @@ class User(SQLModel, table=True):
         sa_column=Column(DateTime(timezone=False), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
     )
 
-    items: List["Item"] = Relationship(back_populates="owner")
-    claims: List["Claim"] = Relationship(back_populates="claimer")
+    items: List["Item"] = Relationship(back_populates="owner", sa_relationship_kwargs={"lazy": "raise_on_sql"})
+    claims: List["Claim"] = Relationship(back_populates="claimer", sa_relationship_kwargs={"lazy": "raise_on_sql"})
 
 
 # ---------- ITEM MODEL ----------
 class Item(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_item_type_date", "type", "date"),
+        Index("ix_item_status_date", "status", "date"),
+        Index("ix_item_type_status_date", "type", "status", "date"),
+        Index("ix_item_owner_date", "owner_id", "date"),
+        Index("ix_item_location", "location"),
+        Index("ix_item_date_id", "date", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(max_length=100)
     description: str = Field(max_length=500)
@@ -31,17 +40,29 @@ class Item(SQLModel, table=True):
     status: str = Field(default="active", max_length=50)
 
     owner_id: Optional[int] = Field(default=None, foreign_key="user.id")
-    owner: Optional[User] = Relationship(back_populates="items")
+    owner: Optional[User] = Relationship(back_populates="items", sa_relationship_kwargs={"lazy": "raise_on_sql"})
 
-    claims: List["Claim"] = Relationship(back_populates="item")
+    claims: List["Claim"] = Relationship(back_populates="item", sa_relationship_kwargs={"lazy": "raise_on_sql"})
     created_at: datetime = Field(
         default_factory=datetime.utcnow,
         sa_column=Column(DateTime(timezone=False), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
     )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=False), nullable=True, onupdate=func.now())
+    )
 
 
 # ---------- CLAIM MODEL ----------
 class Claim(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_claim_claimer_created", "claimer_id", "created_at"),
+        Index("ix_claim_claimer_status_created", "claimer_id", "status", "created_at"),
+        Index("ix_claim_created_id", "created_at", "id"),
+        # One claim per user per item; also serves item_id lookups
+        UniqueConstraint("item_id", "claimer_id", name="uq_claim_item_claimer"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     item_id: int = Field(foreign_key="item.id")
     claimer_id: int = Field(foreign_key="user.id")
@@ -51,6 +72,10 @@ class Claim(SQLModel, table=True):
         default_factory=datetime.utcnow,
         sa_column=Column(DateTime(timezone=False), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
     )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=False), nullable=True, onupdate=func.now())
+    )
 
-    item: Optional[Item] = Relationship(back_populates="claims")
-    claimer: Optional[User] = Relationship(back_populates="claims")
+    item: Optional[Item] = Relationship(back_populates="claims", sa_relationship_kwargs={"lazy": "raise_on_sql"})
+    claimer: Optional[User] = Relationship(back_populates="claims", sa_relationship_kwargs={"lazy": "raise_on_sql"})
@@ -0,0 +1,28 @@
+import base64
+from typing import Callable, Tuple, TypeVar
+import orjson
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: str, row_id: int) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(orjson.dumps([sort_value, row_id])).decode()
+
+
+def decode_cursor(cursor: str, parse: Callable[[str], T]) -> Tuple[T, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    The sort value is converted with parse (e.g. date.fromisoformat).
+    Malformed cursors are rejected with a 400.
+    """
+    try:
+        sort_value, row_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return parse(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlmodel import Session
+from sqlalchemy.exc import IntegrityError
 from app import schemas, models, crud
+from app.cache import LocalCache
 from app.database import get_session
 from passlib.context import CryptContext
 from jose import JWTError, jwt
@@ -14,13 +16,25 @@ load_dotenv()
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2id for new hashes; existing bcrypt hashes still verify and are upgraded on login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    default="argon2",
+    argon2__type="ID",
+    argon2__memory_cost=19456,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+    deprecated="auto",
+)
 SECRET_KEY = os.getenv("SECRET_KEY", "secret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Authenticated users, keyed on user id (detached snapshots)
+user_cache = LocalCache(maxsize=10_000, ttl=30)
+
 
 # ---------- HELPER FUNCTIONS ----------
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -38,9 +52,28 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> models.User:
+def load_user(session: Session, user_id: int) -> Optional[models.User]:
+    """
+    Return the user with the given id, served from user_cache when possible.
+
+    Cached snapshots are merged into the session without a SELECT.
+    """
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return session.merge(cached, load=False)
+
+    user = crud.get_user_by_id(session, user_id)
+    if user is not None:
+        user_cache.set(user_id, crud.detached_user_copy(user))
+    return user
+
+
+def get_current_claims(token: str = Depends(oauth2_scheme)) -> schemas.CurrentUser:
     """
-    Decode JWT token and return the current logged-in user.
+    Decode the JWT and return the caller's id and role without touching the database.
+
+    Use this for endpoints that only need to know who is calling; the role is
+    the one signed into the token at login.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,30 +86,59 @@ def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Dep
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        return schemas.CurrentUser(id=int(user_id), role=payload.get("role") or "user")
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    user = session.get(models.User, int(user_id))
+
+def get_current_user(
+    claims: schemas.CurrentUser = Depends(get_current_claims),
+    session: Session = Depends(get_session)
+) -> models.User:
+    """
+    Return the current logged-in user as a database row.
+
+    Only needed by endpoints that read fresh user fields; the lookup is served
+    from user_cache when possible.
+    """
+    user = load_user(session, claims.id)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 
 # ---------- ROUTES ----------
 @router.post("/register", response_model=schemas.UserRead)
 def register(user: schemas.UserCreate, session: Session = Depends(get_session)):
-    db_user = crud.get_user_by_email(session, email=user.email)
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    # The unique index on user.email rejects duplicates in the same INSERT
     password_hash = get_password_hash(user.password)
-    return crud.create_user(session, user, password_hash)
+    try:
+        return crud.create_user(session, user, password_hash)
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
 
 
 @router.post("/login")
 def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    db_user = crud.get_user_by_email(session, email=form_data.username)
-    if not db_user or not verify_password(form_data.password, db_user.password_hash):
+    db_user = crud.get_user_by_email_cached(session, email=form_data.username)
+    if not db_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
+    verified, new_hash = pwd_context.verify_and_update(form_data.password, db_user.password_hash)
+    if not verified:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    # Re-hash passwords stored with a deprecated scheme (e.g. bcrypt)
+    if new_hash:
+        db_user.password_hash = new_hash
+        session.add(db_user)
+        session.commit()
+        crud.user_by_email_cache.delete(db_user.email)
+
     access_token = create_access_token({"sub": str(db_user.id), "role": db_user.role})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,23 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from sqlmodel import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
+from datetime import datetime
 import logging
-from app import schemas, models, crud
+import orjson
+from app import schemas, crud
+from app.cache import shared_cache, make_key
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 from app.database import get_session
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_claims
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Serialized claim listings, keyed on the filter set and the viewer
+claims_list_cache = shared_cache("claims:list", maxsize=256, ttl=15)
+
 router = APIRouter(prefix="/claims", tags=["Claims"])
 
+
+def invalidate_claim_caches() -> None:
+    """Drop cached listings and statistics after a claim write."""
+    claims_list_cache.clear()
+    crud.stats_cache.delete("claims")
+
 # ==================== CLAIM CREATION & MANAGEMENT ====================
 
 @router.post("/", response_model=schemas.ClaimRead)
 def create_claim(
     claim: schemas.ClaimCreate,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """
     Create a claim for an item.
@@ -29,16 +44,19 @@ def create_claim(
     - Item must exist and be active
     """
     try:
-        # Check if item exists
-        db_item = crud.get_item_by_id(session, claim.item_id)
+        if current_user.id is None:
+            raise HTTPException(status_code=401, detail="Invalid user")
+        
+        # Check if item exists and whether this user already claimed it
+        db_item, already_claimed = crud.get_item_and_claim_exists(session, claim.item_id, int(current_user.id))
         if not db_item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="Item not found"
             )
         
-        # Validate item status (if you have status field)
-        if hasattr(db_item, 'status') and db_item.status != "active":
+        # Validate item status
+        if db_item.status != "active":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot claim inactive items"
@@ -51,22 +69,22 @@ def create_claim(
                 detail="Cannot claim your own item"
             )
         
-        # Check for existing claims by this user for this item
-        existing_claims = crud.get_claims_for_item(session, claim.item_id)
-        user_existing_claim = next(
-            (c for c in existing_claims if c.claimer_id == current_user.id), None
-        )
-        
-        if user_existing_claim:
+        if already_claimed:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="You have already claimed this item"
             )
         
-        # Create the claim
-        if current_user.id is None:
-            raise HTTPException(status_code=401, detail="Invalid user")
-        new_claim = crud.create_claim(session, claim, claimer_id=int(current_user.id))
+        # Create the claim; the unique (item_id, claimer_id) constraint rejects concurrent duplicates
+        try:
+            new_claim = crud.create_claim(session, claim, claimer_id=int(current_user.id))
+            invalidate_claim_caches()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already claimed this item"
+            )
         
         logger.info(f"User {current_user.id} created claim {new_claim.id} for item {claim.item_id}")
         return new_claim
@@ -84,13 +102,14 @@ def create_claim(
 
 @router.get("/", response_model=List[schemas.ClaimRead])
 def list_claims(
-    status_filter: Optional[str] = Query(None, description="Filter by claim status"),
-    item_type: Optional[str] = Query(None, description="Filter by item type (lost/found)"),
+    status_filter: Optional[schemas.ClaimStatus] = Query(None, description="Filter by claim status"),
+    item_type: Optional[schemas.ItemType] = Query(None, description="Filter by item type (lost/found)"),
     my_claims: bool = Query(False, description="Show only my claims"),
     limit: int = Query(25, ge=1, le=100, description="Number of claims to return"),
     offset: int = Query(0, ge=0, description="Number of claims to skip"),
+    cursor: Optional[str] = Query(None, description="Value of the previous page's X-Next-Cursor header"),
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """
     Retrieve claims with filtering options.
@@ -98,47 +117,38 @@ def list_claims(
     **Access Control:**
     - Regular users can see their own claims and claims for their items
     - Admins can see all claims with filtering
+    
+    **Pagination:** when a page is full, the response carries an `X-Next-Cursor`
+    header; pass it back as `cursor` for the next page. Prefer this over `offset`.
     """
     try:
         logger.info(f"User {current_user.id} (role: {current_user.role}) requesting claims with filters: status={status_filter}, item_type={item_type}, my_claims={my_claims}")
         
-        if current_user.role == "admin":
-            # Admins can see all claims with filtering
-            filters = {
-                "status": status_filter,
-                "item_type": item_type,
-                "user_id": current_user.id if my_claims else None,
-                "limit": limit,
-                "offset": offset
-            }
-            claims = crud.get_claims_with_filters(session, filters)
-            logger.info(f"Admin retrieved {len(claims)} claims")
-            return claims
-        else:
-            # Regular users can see their own claims + claims for their items
-            if current_user.id is None:
-                raise HTTPException(status_code=401, detail="Invalid user")
-            user_claims = crud.get_claims_by_user(session, int(current_user.id))
-            
-            # Also get claims for items they own
-            user_items = crud.get_items_with_filters(session, {"owner_id": int(current_user.id)})
-            item_claims = []
-            for item in user_items:
-                item_claims.extend(crud.get_claims_for_item(session, int(item.id)))
-            
-            # Combine and deduplicate
-            all_claims = user_claims + [claim for claim in item_claims if claim.id not in [c.id for c in user_claims]]
-            
-            # Apply filtering
-            if status_filter:
-                all_claims = [c for c in all_claims if hasattr(c, 'status') and c.status == status_filter]
-            
-            # Apply pagination
-            paginated_claims = all_claims[offset:offset + limit]
-            
-            logger.info(f"User retrieved {len(paginated_claims)} claims")
-            return paginated_claims
-            
+        filters = {
+            "status": status_filter,
+            "item_type": item_type,
+            "my_claims": my_claims,
+            "cursor": decode_cursor(cursor, datetime.fromisoformat) if cursor else None,
+            "limit": limit,
+            "offset": offset
+        }
+        
+        # What a viewer may see depends on who they are, so they are part of the cache key
+        cache_key = make_key({**filters, "viewer": current_user.id, "role": current_user.role})
+        result = claims_list_cache.get(cache_key)
+        if result is None:
+            claims = crud.list_claims(session, current_user, filters)
+            result = schemas.CLAIM_LIST_ADAPTER.dump_python(claims, mode="json")
+            claims_list_cache.set(cache_key, result)
+        
+        logger.info(f"User {current_user.id} retrieved {len(result)} claims")
+        headers = {}
+        if len(result) == limit:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(result[-1]["created_at"], result[-1]["id"])
+        return Response(content=orjson.dumps(result), media_type="application/json", headers=headers)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving claims for user {current_user.id}: {str(e)}")
         raise HTTPException(
@@ -148,10 +158,10 @@ def list_claims(
 
 # 🔥 SPECIFIC ROUTES BEFORE GENERIC ONES - FIXED ORDER
 
-@router.get("/stats/overview")
+@router.get("/stats/overview", response_model=schemas.ClaimStatistics)
 def get_claims_statistics(
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Get statistics about claims (admin only)."""
     if current_user.role != "admin":
@@ -173,7 +183,7 @@ def get_claims_statistics(
 def get_claims_for_item(
     item_id: int,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """
     Retrieve all claims for a specific item.
@@ -200,7 +210,9 @@ def get_claims_for_item(
             )
         
         claims = crud.get_claims_for_item(session, item_id)
-        return claims
+        adapter = schemas.CLAIM_LIST_ADAPTER
+        body = adapter.dump_json(adapter.validate_python(claims, from_attributes=True))
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -216,7 +228,7 @@ def get_claims_for_item(
 def get_claim(
     claim_id: int,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Get a specific claim by ID."""
     try:
@@ -231,7 +243,7 @@ def get_claim(
         if (current_user.role != "admin" and 
             db_claim.claimer_id != current_user.id):
             # Also check if user is the item owner
-            db_item = crud.get_item_by_id(session, db_claim.item_id)
+            db_item = db_claim.item
             if not db_item or db_item.owner_id != current_user.id:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -256,7 +268,7 @@ def update_claim_status(
     claim_id: int,
     status_update: schemas.ClaimStatusUpdate,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """
     Update claim status (approve, reject, etc.).
@@ -273,8 +285,8 @@ def update_claim_status(
                 detail="Claim not found"
             )
         
-        # Get the item to check ownership
-        db_item = crud.get_item_by_id(session, db_claim.item_id)
+        # Get the item to check ownership (loaded with the claim)
+        db_item = db_claim.item
         if not db_item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -298,8 +310,9 @@ def update_claim_status(
         
         # Update claim status
         updated_claim = crud.update_claim_status(
-            session, claim_id, status_update.status
+            session, db_claim, status_update.status
         )
+        invalidate_claim_caches()
         
         logger.info(f"User {current_user.id} updated claim {claim_id} status to {status_update.status}")
         return updated_claim
@@ -315,11 +328,11 @@ def update_claim_status(
 
 # ==================== CLAIM DELETION ====================
 
-@router.delete("/{claim_id}")
+@router.delete("/{claim_id}", response_model=schemas.MessageResponse)
 def delete_claim(
     claim_id: int,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """
     Delete a claim.
@@ -345,7 +358,7 @@ def delete_claim(
         
         # Also allow item owner to delete claims
         if not can_delete:
-            db_item = crud.get_item_by_id(session, db_claim.item_id)
+            db_item = db_claim.item
             if db_item and db_item.owner_id == current_user.id:
                 can_delete = True
         
@@ -356,12 +369,8 @@ def delete_claim(
             )
         
         # Delete the claim
-        success = crud.delete_claim(session, claim_id)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to delete claim"
-            )
+        crud.delete_claim(session, db_claim)
+        invalidate_claim_caches()
         
         logger.info(f"User {current_user.id} deleted claim {claim_id}")
         return {"message": "Claim deleted successfully"}
@@ -381,7 +390,7 @@ def delete_claim(
 # def bulk_approve_claims(
 #     claim_ids: List[int],
 #     session: Session = Depends(get_session),
-#     current_user: models.User = Depends(get_current_user)
+#     current_user: schemas.CurrentUser = Depends(get_current_claims)
 # ):
 #     """Bulk approve multiple claims (admin only)."""
 #     if current_user.role != "admin":
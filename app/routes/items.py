@@ -1,145 +1,287 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile, File, Form, Query
+from fastapi.responses import FileResponse, Response
 from sqlmodel import Session
-from typing import List, Optional, cast
-import shutil
+from typing import List, Optional, Tuple
 import os
+import re
 import uuid
 import logging
+import hashlib
+import mimetypes
+import orjson
 from datetime import date as Date
 from pathlib import Path
-from app import schemas, models, crud
+from app import schemas, crud, database
+from app.cache import LocalCache, shared_cache, make_key
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 from app.database import get_session
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_claims
+from app.routes.claims import claims_list_cache
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 # File upload configuration
 UPLOAD_DIR = "uploads"
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+ALLOWED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+ALLOWED_EXTENSION_RE = re.compile(r"\.(jpe?g|png|gif|webp)$", re.IGNORECASE)
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+UPLOAD_CHUNK_SIZE = 64 * 1024  # bytes read from the upload per write
+
+# Leading bytes of each accepted image format (JPEG, PNG, GIF; WebP is checked separately)
+IMAGE_SIGNATURES = (b"\xff\xd8\xff", b"\x89PNG\r\n\x1a\n", b"GIF87a", b"GIF89a")
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# When set (e.g. "/protected_uploads/"), image bytes are sent by the reverse proxy
+# via X-Accel-Redirect; the proxy must map this internal location to UPLOAD_DIR
+X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX")
+# /items/{id}/image changes when the item's image is replaced, so caches keep it
+# briefly and then revalidate against the ETag (the stored file's content hash)
+IMAGE_CACHE_CONTROL = "public, max-age=60"
+
+# Stored images recently seen on disk. Only positive results are cached: a
+# path can come back after being deleted (same bytes re-uploaded), and other
+# workers add and remove files without touching this process's entries
+image_exists_cache = LocalCache(maxsize=4096, ttl=60)
+
+# Serialized item listings, keyed on the full filter set
+items_list_cache = shared_cache("items:list", maxsize=256, ttl=15)
+
 # Main items router
 router = APIRouter(prefix="/items", tags=["Items"])
 
 
-def validate_image(image: UploadFile) -> None:
-    """Validate uploaded image file."""
+def invalidate_item_caches() -> None:
+    """Drop cached listings and statistics after an item write."""
+    items_list_cache.clear()
+    # Claim listings filter on the item's type and owner
+    claims_list_cache.clear()
+    crud.stats_cache.delete("items")
+
+
+def validate_image(image: UploadFile) -> str:
+    """Validate uploaded image file and return its lower-cased extension."""
     if not image.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
-    filename = cast(str, image.filename)
     
-    file_ext = os.path.splitext(filename)[1].lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
+    match = ALLOWED_EXTENSION_RE.search(image.filename)
+    if not match:
         raise HTTPException(
             status_code=400, 
             detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
-    
-    # Check file size
-    image.file.seek(0, 2)  # Seek to end
-    file_size = image.file.tell()
-    image.file.seek(0)  # Reset to beginning
-    
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large (max 5MB)")
+    return match.group(0).lower()
 
 
-def save_uploaded_file(image: UploadFile, item_type: str, user_id: int) -> str:
-    """Save uploaded file with secure filename."""
-    validate_image(image)
-    
-    file_ext = os.path.splitext(cast(str, image.filename))[1].lower()
-    secure_filename = f"{item_type}_{user_id}_{uuid.uuid4()}{file_ext}"
-    image_path = Path(UPLOAD_DIR) / secure_filename
+def is_image_content(head: bytes) -> bool:
+    """Check the first bytes of a file against the accepted image formats."""
+    if head.startswith(IMAGE_SIGNATURES):
+        return True
+    # WebP is a RIFF container: "RIFF" <size> "WEBP"
+    return head[:4] == b"RIFF" and head[8:12] == b"WEBP"
+
+
+def stage_uploaded_file(image: UploadFile) -> Tuple[str, Path]:
+    """
+    Write an uploaded image to a temporary file and work out where it will live.
+
+    Identical images share one file (uploads/<sha256><ext>), so the same
+    photo uploaded for several items is stored once. Returns the stored path
+    and the temporary file; call publish_image once the item row referencing
+    the path has been committed, or discard_staged_image if it was not.
+    """
+    file_ext = validate_image(image)
+    tmp_path = Path(UPLOAD_DIR) / f".{uuid.uuid4()}.part"
+    digest = hashlib.sha256()
     
+    # Stream to disk in chunks, enforcing the size limit and hashing as bytes arrive
     try:
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        return str(image_path)
+        with open(tmp_path, "wb") as buffer:
+            total = 0
+            while chunk := image.file.read(UPLOAD_CHUNK_SIZE):
+                if total == 0 and not is_image_content(chunk):
+                    raise HTTPException(status_code=400, detail="File content is not a supported image")
+                total += len(chunk)
+                if total > MAX_FILE_SIZE:
+                    raise HTTPException(status_code=400, detail="File too large (max 5MB)")
+                digest.update(chunk)
+                buffer.write(chunk)
+        
+        # An empty upload never reaches the signature check inside the loop
+        if total == 0:
+            raise HTTPException(status_code=400, detail="File content is not a supported image")
+        
+        image_path = Path(UPLOAD_DIR) / f"{digest.hexdigest()}{file_ext}"
+        return str(image_path), tmp_path
+    except HTTPException:
+        tmp_path.unlink(missing_ok=True)
+        raise
     except Exception as e:
         # Clean up partial file if save failed
-        if image_path.exists():
-            image_path.unlink()
+        tmp_path.unlink(missing_ok=True)
         logger.error(f"Failed to save image: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to save image")
     finally:
         image.file.close()
 
 
+def publish_image(image_path: str, tmp_path: Path) -> None:
+    """
+    Move a staged upload into place after its item row has been committed.
+
+    Done even when the file already exists: a concurrent cleanup may be about
+    to remove it (see remove_image_if_still_unused), and renaming identical
+    bytes over it is harmless.
+    """
+    try:
+        os.replace(tmp_path, image_path)
+        image_exists_cache.set(image_path, True)
+    except Exception as e:
+        logger.error(f"Failed to store image {image_path}: {str(e)}")
+
+
+def discard_staged_image(tmp_path: Path) -> None:
+    """Drop a staged upload whose item row was never committed."""
+    tmp_path.unlink(missing_ok=True)
+
+
+def image_file_exists(image_path: str) -> bool:
+    """os.path.exists for stored images; a cached hit skips the stat."""
+    if image_exists_cache.get(image_path):
+        return True
+    exists = os.path.exists(image_path)
+    if exists:
+        image_exists_cache.set(image_path, True)
+    return exists
+
+
+def remove_file(path: str) -> None:
+    """Delete a file, ignoring one that is already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to delete image file {path}: {str(e)}")
+
+
+def remove_image_if_unused(
+    session: Session,
+    image_path: Optional[str],
+    background_tasks: BackgroundTasks
+) -> None:
+    """
+    Delete a stored image once no item references it (files are shared by content).
+
+    The unlink runs after the response has been sent.
+    """
+    if not image_path or crud.is_image_referenced(session, image_path):
+        return
+    background_tasks.add_task(remove_image_if_still_unused, image_path)
+
+
+def remove_image_if_still_unused(image_path: str) -> None:
+    """
+    Background half of remove_image_if_unused.
+
+    The file is first renamed aside and only then are references checked
+    again. An upload of the same bytes that committed before the check is
+    seen and the file is put back; one that commits after it publishes its
+    own copy afterwards, so neither loses its image. Runs after the request's
+    session is gone, so it opens its own.
+    """
+    trash_path = Path(UPLOAD_DIR) / f".{uuid.uuid4()}.trash"
+    try:
+        os.rename(image_path, trash_path)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logger.warning(f"Failed to delete image file {image_path}: {str(e)}")
+        return
+    image_exists_cache.delete(image_path)
+    
+    try:
+        with Session(database.engine, expire_on_commit=False) as session:
+            referenced = crud.is_image_referenced(session, image_path)
+    except Exception as e:
+        logger.warning(f"Keeping image file {image_path}, reference check failed: {str(e)}")
+        referenced = True
+    
+    if referenced:
+        os.replace(trash_path, image_path)
+        image_exists_cache.set(image_path, True)
+    else:
+        remove_file(str(trash_path))
+
+
 # ==================== UNIFIED ITEMS ENDPOINTS WITH FILTERING ====================
 
 @router.post("/", response_model=schemas.ItemRead)
 def create_item(
     name: str = Form(..., min_length=1, max_length=100),
     description: str = Form(..., min_length=1, max_length=500),
-    item_type: str = Form(...),
+    item_type: schemas.ItemType = Form(...),
     location: str = Form(..., min_length=1, max_length=100),
     date: Date = Form(...),
     image: Optional[UploadFile] = File(None),
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Create a new lost or found item with optional image."""
     
-    # Validate item_type
-    valid_types = {"lost", "found"}
-    if item_type.lower() not in valid_types:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid item_type. Must be one of: {', '.join(valid_types)}"
-        )
-    
     # Validate date
-    today = Date.today()
-    if item_type.lower() == "found" and date > today:
+    today = schemas.current_date()
+    if item_type == "found" and date > today:
         raise HTTPException(status_code=400, detail="Found date cannot be in the future")
     
-    # Save image if provided
-    image_path = None
-    if image:
-        if current_user.id is None:
-            raise HTTPException(status_code=401, detail="Invalid user")
-        image_path = save_uploaded_file(image, item_type.lower(), int(current_user.id))
-    
     # Create item
     item_data = schemas.ItemCreate(
         name=name.strip(),
         description=description.strip(),
-        item_type=schemas.ItemTypeEnum(item_type.lower()),
+        item_type=item_type,
         location=location.strip(),
         date=date,
-        image_url=image_path
     )
     
+    # Stage image if provided; it is moved into place once the item is committed
+    image_path, staged_path = None, None
+    if image:
+        image_path, staged_path = stage_uploaded_file(image)
+        item_data.image_url = image_path
+    
     try:
         if current_user.id is None:
             raise HTTPException(status_code=401, detail="Invalid user")
-        return crud.create_item(session, item_data, owner_id=int(current_user.id))
+        db_item = crud.create_item(session, item_data, owner_id=int(current_user.id))
     except Exception as e:
-        # Clean up uploaded file if database operation fails
-        if image_path and os.path.exists(image_path):
-            os.remove(image_path)
+        # Nothing references the staged upload, so just drop it
+        session.rollback()
+        if staged_path:
+            discard_staged_image(staged_path)
         logger.error(f"Failed to create item for user {current_user.id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create item")
+    
+    if staged_path:
+        publish_image(image_path, staged_path)
+    invalidate_item_caches()
+    return db_item
 
 
 @router.get("/", response_model=List[schemas.ItemRead])
 def list_items(
-    item_type: Optional[str] = Query(None, description="Filter by item type: 'lost' or 'found'"),
+    item_type: Optional[schemas.ItemType] = Query(None, description="Filter by item type: 'lost' or 'found'"),
     location: Optional[str] = Query(None, description="Filter by location"),
     date_from: Optional[Date] = Query(None, description="Filter items from this date"),
     date_to: Optional[Date] = Query(None, description="Filter items until this date"),
-    status: Optional[str] = Query(None, description="Filter by status: 'active', 'claimed', 'returned'"),
+    status: Optional[schemas.ItemStatus] = Query(None, description="Filter by status: 'active', 'claimed', 'returned'"),
     owner_only: bool = Query(False, description="Show only items owned by current user"),
     search: Optional[str] = Query(None, description="Search in name and description"),
     limit: int = Query(25, ge=1, le=100, description="Number of items to return"),
     offset: int = Query(0, ge=0, description="Number of items to skip"),
+    cursor: Optional[str] = Query(None, description="Value of the previous page's X-Next-Cursor header"),
     session: Session = Depends(get_session),
-    current_user: Optional[models.User] = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """
     Retrieve items with comprehensive filtering options.
@@ -152,43 +294,48 @@ def list_items(
     - Get recent lost items: `/items?item_type=lost&date_from=2025-01-01`
     - Search for wallet: `/items?search=wallet`
     - Get user's own items: `/items?owner_only=true`
-    """
     
-    # Validate item_type filter
-    if item_type and item_type.lower() not in {"lost", "found"}:
-        raise HTTPException(status_code=400, detail="Invalid item_type. Must be 'lost' or 'found'")
-    
-    # Validate status filter
-    valid_statuses = {"active", "claimed", "returned"}
-    if status and status.lower() not in valid_statuses:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
-        )
+    **Pagination:** when a page is full, the response carries an `X-Next-Cursor`
+    header; pass it back as `cursor` for the next page. Prefer this over
+    `offset`, whose cost grows with the page depth.
+    """
     
     # Validate date range
     if date_from and date_to and date_from > date_to:
         raise HTTPException(status_code=400, detail="date_from cannot be after date_to")
     
     filters = {
-        "item_type": item_type.lower() if item_type else None,
+        "item_type": item_type,
         "location": location,
         "date_from": date_from,
         "date_to": date_to,
-        "status": status.lower() if status else None,
+        "status": status,
         "owner_id": current_user.id if owner_only and current_user else None,
         "search": search,
+        "cursor": decode_cursor(cursor, Date.fromisoformat) if cursor else None,
         "limit": limit,
         "offset": offset
     }
     
-    return crud.get_items_with_filters(session, filters)
+    # Rows are already shaped by ItemRead, so encode them directly with orjson
+    # rather than letting FastAPI validate the list against response_model again
+    cache_key = make_key(filters)
+    result = items_list_cache.get(cache_key)
+    if result is None:
+        items = crud.list_items_dto(session, filters)
+        result = schemas.ITEM_LIST_ADAPTER.dump_python(items, mode="json")
+        items_list_cache.set(cache_key, result)
+    
+    headers = {}
+    if len(result) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(result[-1]["date"], result[-1]["id"])
+    return Response(content=orjson.dumps(result), media_type="application/json", headers=headers)
 
 
-@router.get("/stats")
+@router.get("/stats", response_model=schemas.ItemStatistics)
 def get_items_statistics(
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Get comprehensive statistics about items in the system."""
     return crud.get_items_statistics(session)
@@ -209,20 +356,48 @@ def get_item(
 @router.get("/{item_id}/image")
 def get_item_image(
     item_id: int,
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    """Serve the image file for an item."""
+    """Serve the image file for an item (304 when the client's copy is current)."""
     db_item = crud.get_item_by_id(session, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    if not db_item.image_url or not os.path.exists(db_item.image_url):
+    if not db_item.image_url or not image_file_exists(db_item.image_url):
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    media_type = mimetypes.guess_type(db_item.image_url)[0] or "application/octet-stream"
+    stored_name = os.path.basename(db_item.image_url)
+    # Stored files are named by their SHA-256, which makes a strong validator
+    headers = {
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+        "ETag": f'"{os.path.splitext(stored_name)[0]}"',
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    
+    if X_ACCEL_REDIRECT_PREFIX:
+        # Only authorize here; the proxy streams the file with sendfile
+        headers["X-Accel-Redirect"] = f"{X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{stored_name}"
+        return Response(media_type=media_type, headers=headers)
+    
+    # A cached hit may be stale (another worker removed the file); stat here so
+    # a missing file is a 404 rather than an error while sending the response
+    try:
+        stat_result = os.stat(db_item.image_url)
+    except FileNotFoundError:
+        image_exists_cache.delete(db_item.image_url)
         raise HTTPException(status_code=404, detail="Image not found")
     
     return FileResponse(
         db_item.image_url,
-        media_type="image/jpeg",
-        filename=f"item_{item_id}_image.jpg"
+        media_type=media_type,
+        filename=f"item_{item_id}_image{os.path.splitext(db_item.image_url)[1]}",
+        headers=headers,
+        stat_result=stat_result,
     )
 
 
@@ -231,7 +406,7 @@ def update_item(
     item_id: int,
     item_data: schemas.ItemUpdate,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Update an item. Only the owner or admin can update."""
     db_item = crud.get_item_by_id(session, item_id)
@@ -243,7 +418,9 @@ def update_item(
         raise HTTPException(status_code=403, detail="Not authorized to update this item")
     
     try:
-        return crud.update_item(session, db_item, item_data)
+        db_item = crud.update_item(session, db_item, item_data)
+        invalidate_item_caches()
+        return db_item
     except Exception as e:
         logger.error(f"Failed to update item {item_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update item")
@@ -252,9 +429,10 @@ def update_item(
 @router.put("/{item_id}/image", response_model=schemas.ItemRead)
 def update_item_image(
     item_id: int,
+    background_tasks: BackgroundTasks,
     image: UploadFile = File(...),
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Update the image for an item."""
     db_item = crud.get_item_by_id(session, item_id)
@@ -265,35 +443,36 @@ def update_item_image(
     if db_item.owner_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to update this item")
     
-    # Save new image
-    if current_user.id is None:
-        raise HTTPException(status_code=401, detail="Invalid user")
-    image_path = save_uploaded_file(image, db_item.item_type, int(current_user.id))
-    
-    # Remove old image if exists
-    if db_item.image_url and os.path.exists(db_item.image_url):
-        try:
-            os.remove(db_item.image_url)
-        except Exception as e:
-            logger.warning(f"Failed to delete old image {db_item.image_url}: {str(e)}")
+    # Stage new image; it is moved into place once the item is committed
+    image_path, staged_path = stage_uploaded_file(image)
+    old_image_path = db_item.image_url
     
     # Update item with new image path
     try:
         item_update = schemas.ItemUpdate.model_validate({"image_url": image_path})
-        return crud.update_item(session, db_item, item_update)
+        db_item = crud.update_item(session, db_item, item_update)
     except Exception as e:
-        # Clean up new image if database update fails
-        if os.path.exists(image_path):
-            os.remove(image_path)
+        # Nothing references the staged upload, so just drop it
+        session.rollback()
+        discard_staged_image(staged_path)
         logger.error(f"Failed to update item image {item_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update item image")
+    
+    publish_image(image_path, staged_path)
+    invalidate_item_caches()
+    
+    # Remove old image if no other item shares it
+    if old_image_path != image_path:
+        remove_image_if_unused(session, old_image_path, background_tasks)
+    return db_item
 
 
-@router.delete("/{item_id}")
+@router.delete("/{item_id}", response_model=schemas.MessageResponse)
 def delete_item(
     item_id: int,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: schemas.CurrentUser = Depends(get_current_claims)
 ):
     """Delete an item. Only the owner or admin can delete."""
     db_item = crud.get_item_by_id(session, item_id)
@@ -304,19 +483,17 @@ def delete_item(
     if db_item.owner_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this item")
 
-    # Clean up image file if exists
-    if db_item.image_url and os.path.exists(db_item.image_url):
-        try:
-            os.remove(db_item.image_url)
-        except Exception as e:
-            logger.warning(f"Failed to delete image file {db_item.image_url}: {str(e)}")
-
+    image_path = db_item.image_url
     try:
         crud.delete_item(session, db_item)
-        return {"message": "Item deleted successfully"}
+        invalidate_item_caches()
     except Exception as e:
         logger.error(f"Failed to delete item {item_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to delete item")
+    
+    # Clean up image file if no other item shares it
+    remove_image_if_unused(session, image_path, background_tasks)
+    return {"message": "Item deleted successfully"}
 
 
 # # ==================== BULK OPERATIONS ====================
@@ -326,7 +503,7 @@ def delete_item(
 #     item_ids: List[int],
 #     new_status: str,
 #     session: Session = Depends(get_session),
-#     current_user: models.User = Depends(get_current_user)
+#     current_user: schemas.CurrentUser = Depends(get_current_claims)
 # ):
 #     """Bulk update status for multiple items (admin only)."""
 #     if current_user.role != "admin":
@@ -355,7 +532,7 @@ def delete_item(
 # def bulk_delete_items(
 #     item_ids: List[int],
 #     session: Session = Depends(get_session),
-#     current_user: models.User = Depends(get_current_user)
+#     current_user: schemas.CurrentUser = Depends(get_current_claims)
 # ):
 #     """Bulk delete multiple items (admin only)."""
 #     if current_user.role != "admin":
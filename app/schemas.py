@@ -1,6 +1,8 @@
-from typing import Optional, List
-from pydantic import BaseModel, Field, field_validator, ConfigDict
-from datetime import datetime, date as Date
+import time
+from typing import Annotated, Dict, FrozenSet, Literal, Optional, List, Set, Tuple, Union
+from typing_extensions import TypedDict
+from pydantic import BaseModel, Field, field_validator, ConfigDict, StringConstraints, TypeAdapter, ValidationInfo
+from datetime import datetime, timedelta, date as Date
 from enum import Enum
 
 
@@ -28,15 +30,44 @@ class UserRoleEnum(str, Enum):
     ADMIN = "admin"
 
 
+# Literal equivalents used for schema fields and query parameters: validating
+# them is a plain membership check and yields str values, not Enum members
+ItemType = Literal["lost", "found"]
+ItemStatus = Literal["active", "claimed", "returned"]
+ClaimStatus = Literal["pending", "approved", "rejected", "completed"]
+UserRole = Literal["user", "admin"]
+
+
+# ---------- CONSTRAINED TYPES ----------
+# Non-empty strings shared by names, locations, descriptions and messages
+ShortStr = Annotated[str, StringConstraints(min_length=1, max_length=100)]
+MediumStr = Annotated[str, StringConstraints(min_length=1, max_length=500)]
+
+# Shape check only (something@domain.tld); the pattern runs in pydantic-core's
+# Rust regex engine
+EmailAddress = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254)]
+
+
+# ---------- BASE CLASSES ----------
+class FromRowMixin:
+    """Build a response model from a SQLAlchemy row without validating it."""
+
+    @classmethod
+    def from_row_fast(cls, row):
+        # Only for rows selected with exactly this model's columns: the
+        # database has already enforced the types, so validation is skipped
+        return cls.model_construct(**row._asdict())
+
+
 # ---------- USER SCHEMAS ----------
 class UserBase(BaseModel):
-    name: str = Field(..., min_length=1, max_length=100)
-    email: str
+    name: ShortStr
+    email: EmailAddress
 
 
 class UserCreate(UserBase):
     password: str = Field(..., min_length=6, max_length=100)
-    role: Optional[UserRoleEnum] = UserRoleEnum.USER
+    role: Optional[UserRole] = "user"
 
 
 class UserRead(BaseModel):
@@ -46,7 +77,16 @@ class UserRead(BaseModel):
     role: str
     created_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class UserReadDict(TypedDict):
+    """UserRead as a plain dict, for embedding in other responses"""
+    id: int
+    name: str
+    email: str
+    role: str
+    created_at: datetime
 
 
 class UserLogin(BaseModel):
@@ -55,61 +95,81 @@ class UserLogin(BaseModel):
 
 
 class UserUpdate(BaseModel):
-    name: Optional[str] = Field(None, min_length=1, max_length=100)
-    email: Optional[str] = None
+    name: Optional[ShortStr] = None
+    email: Optional[EmailAddress] = None
 
 
 # ---------- ITEM SCHEMAS ----------
 class ItemBase(BaseModel):
-    name: str = Field(..., min_length=1, max_length=100)
-    description: str = Field(..., min_length=1, max_length=500)
-    item_type: ItemTypeEnum
-    location: str = Field(..., min_length=1, max_length=100)
+    name: ShortStr
+    description: MediumStr
+    item_type: ItemType
+    location: ShortStr
     date: Date
     image_url: Optional[str] = None
 
+
+class ItemCreate(ItemBase):
+    # Only checked on input; stored items are read back without re-validating
     @field_validator('date')
     @classmethod
     def validate_date(cls, v):
-        if v > Date.today():  # Fixed: Use Date.today() instead of date.today()
+        if v > current_date():
             raise ValueError('Date cannot be in the future')
         return v
 
 
-class ItemCreate(ItemBase):
-    pass
-
-
 class ItemUpdate(BaseModel):
-    name: Optional[str] = Field(None, min_length=1, max_length=100)
-    description: Optional[str] = Field(None, min_length=1, max_length=500)
-    item_type: Optional[ItemTypeEnum] = None
-    location: Optional[str] = Field(None, min_length=1, max_length=100)
+    name: Optional[ShortStr] = None
+    description: Optional[MediumStr] = None
+    item_type: Optional[ItemType] = None
+    location: Optional[ShortStr] = None
     date: Optional[Date] = None
     image_url: Optional[str] = None
-    status: Optional[ItemStatusEnum] = None
+    status: Optional[ItemStatus] = None
 
     @field_validator('date')
     @classmethod
     def validate_date(cls, v):
-        if v and v > Date.today():  # Fixed: Use Date.today() instead of date.today()
+        if v and v > current_date():
             raise ValueError('Date cannot be in the future')
         return v
 
 
-class ItemRead(ItemBase):
+class ItemRead(FromRowMixin, ItemBase):
     id: int
     owner_id: int
     status: Optional[str] = "active"
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class ItemReadDict(TypedDict):
+    """ItemRead as a plain dict, for embedding in other responses"""
+    id: int
+    name: str
+    description: str
+    item_type: str
+    location: str
+    date: Date
+    image_url: Optional[str]
+    owner_id: int
+    status: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
 
 
 class ItemWithOwner(ItemRead):
     """Item schema that includes owner information"""
-    owner: UserRead
+    owner: UserReadDict
+
+
+class LocationCount(BaseModel):
+    """Number of items reported at a location"""
+    location: str
+    count: int
 
 
 class ItemStatistics(BaseModel):
@@ -121,12 +181,12 @@ class ItemStatistics(BaseModel):
     claimed_items: Optional[int] = None
     returned_items: Optional[int] = None
     recent_items_30_days: int
-    top_locations: List[dict]
+    top_locations: List[LocationCount]
 
 
 # ---------- CLAIM SCHEMAS ----------
 class ClaimBase(BaseModel):
-    message: str = Field(..., min_length=1, max_length=500)
+    message: MediumStr
 
 
 class ClaimCreate(ClaimBase):
@@ -134,16 +194,16 @@ class ClaimCreate(ClaimBase):
 
 
 class ClaimUpdate(BaseModel):
-    message: Optional[str] = Field(None, min_length=1, max_length=500)
-    status: Optional[ClaimStatusEnum] = None
+    message: Optional[MediumStr] = None
+    status: Optional[ClaimStatus] = None
 
 
 class ClaimStatusUpdate(BaseModel):
-    status: ClaimStatusEnum
+    status: ClaimStatus
     admin_notes: Optional[str] = Field(None, max_length=300)
 
 
-class ClaimRead(ClaimBase):
+class ClaimRead(FromRowMixin, ClaimBase):
     id: int
     item_id: int
     claimer_id: int
@@ -152,23 +212,34 @@ class ClaimRead(ClaimBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class ClaimWithItem(ClaimRead):
     """Claim schema that includes item information"""
-    item: ItemRead
+    response_kind: Literal["item"] = "item"
+    item: ItemReadDict
 
 
 class ClaimWithUser(ClaimRead):
     """Claim schema that includes claimer information"""
-    claimer: UserRead
+    response_kind: Literal["user"] = "user"
+    claimer: UserReadDict
 
 
 class ClaimWithDetails(ClaimRead):
     """Claim schema that includes both item and claimer information"""
-    item: ItemRead
-    claimer: UserRead
+    response_kind: Literal["details"] = "details"
+    item: ItemReadDict
+    claimer: UserReadDict
+
+
+# Any of the claim shapes above, dispatched on response_kind instead of
+# trying each variant in turn
+ClaimResponse = Annotated[
+    Union[ClaimWithItem, ClaimWithUser, ClaimWithDetails],
+    Field(discriminator="response_kind"),
+]
 
 
 class ClaimStatistics(BaseModel):
@@ -183,19 +254,22 @@ class ClaimStatistics(BaseModel):
 
 
 # ---------- BULK OPERATION SCHEMAS ----------
+# Upper bound on ids per bulk request; keeps validation and the IN (...) list small
+MAX_BULK_IDS = 500
+
 class BulkItemUpdate(BaseModel):
-    item_ids: List[int] = Field(..., min_length=1)
-    status: ItemStatusEnum
+    item_ids: Set[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+    status: ItemStatus
 
 
 class BulkClaimUpdate(BaseModel):
-    claim_ids: List[int] = Field(..., min_length=1)
-    status: ClaimStatusEnum
+    claim_ids: Set[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+    status: ClaimStatus
     admin_notes: Optional[str] = Field(None, max_length=300)
 
 
 class BulkDeleteRequest(BaseModel):
-    item_ids: List[int] = Field(..., min_length=1)
+    item_ids: Set[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
 
 
 # ---------- RESPONSE SCHEMAS ----------
@@ -217,11 +291,11 @@ class BulkDeleteResponse(BaseModel):
 # ---------- FILTER SCHEMAS ----------
 class ItemFilters(BaseModel):
     """Schema for item filtering parameters"""
-    item_type: Optional[ItemTypeEnum] = None
+    item_type: Optional[ItemType] = None
     location: Optional[str] = None
     date_from: Optional[Date] = None  # Fixed: Use Date instead of date
     date_to: Optional[Date] = None    # Fixed: Use Date instead of date
-    status: Optional[ItemStatusEnum] = None
+    status: Optional[ItemStatus] = None
     owner_only: bool = False
     search: Optional[str] = None
     limit: int = Field(25, ge=1, le=100)
@@ -229,8 +303,8 @@ class ItemFilters(BaseModel):
 
     @field_validator('date_to')
     @classmethod
-    def validate_date_range(cls, v, values):
-        date_from = values.get('date_from')
+    def validate_date_range(cls, v, info: ValidationInfo):
+        date_from = info.data.get('date_from')
         if date_from and v and date_from > v:
             raise ValueError('date_from cannot be after date_to')
         return v
@@ -238,8 +312,8 @@ class ItemFilters(BaseModel):
 
 class ClaimFilters(BaseModel):
     """Schema for claim filtering parameters"""
-    status: Optional[ClaimStatusEnum] = None
-    item_type: Optional[ItemTypeEnum] = None
+    status: Optional[ClaimStatus] = None
+    item_type: Optional[ItemType] = None
     my_claims: bool = False
     limit: int = Field(25, ge=1, le=100)
     offset: int = Field(0, ge=0)
@@ -256,6 +330,12 @@ class TokenData(BaseModel):
     email: Optional[str] = None
 
 
+class CurrentUser(BaseModel):
+    """Authenticated caller as described by the signed JWT claims (no DB lookup)"""
+    id: int
+    role: str = UserRoleEnum.USER.value
+
+
 # ---------- IMAGE UPLOAD SCHEMAS ----------
 class ImageUploadResponse(BaseModel):
     message: str
@@ -267,7 +347,7 @@ class ImageUploadResponse(BaseModel):
 class SearchFilters(BaseModel):
     """Schema for advanced search parameters"""
     query: str = Field(..., min_length=1, max_length=200)
-    item_type: Optional[ItemTypeEnum] = None
+    item_type: Optional[ItemType] = None
     location: Optional[str] = None
     date_from: Optional[Date] = None  # Fixed: Use Date instead of date
     date_to: Optional[Date] = None    # Fixed: Use Date instead of date
@@ -284,7 +364,7 @@ class SimilarItemsResponse(BaseModel):
 
 # ---------- NOTIFICATION SCHEMAS ----------
 class NotificationBase(BaseModel):
-    title: str = Field(..., min_length=1, max_length=100)
+    title: ShortStr
     message: str = Field(..., min_length=1, max_length=300)
     notification_type: str  # "claim_created", "claim_approved", "item_matched", etc.
 
@@ -303,21 +383,50 @@ class NotificationRead(NotificationBase):
     is_read: bool = False
     created_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+# ---------- TYPE ADAPTERS ----------
+# Built once at import; list endpoints serialize whole pages through these
+ITEM_LIST_ADAPTER = TypeAdapter(List[ItemRead])
+CLAIM_LIST_ADAPTER = TypeAdapter(List[ClaimRead])
 
 
 # ---------- VALIDATION HELPERS ----------
+# (today, epoch second at which it stops being today)
+_today_cache: Tuple[Date, float] = (Date.min, 0.0)
+
+
+def current_date() -> Date:
+    """
+    Local date, recomputed only after midnight.
+
+    Used by the date validators so validating many rows does not call
+    Date.today() for each one.
+    """
+    global _today_cache
+    today, expires_at = _today_cache
+    if time.time() >= expires_at:
+        today = Date.today()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _today_cache = (today, midnight.timestamp())
+    return today
+
+
 def validate_item_type_transition(current_type: str, new_type: str) -> bool:
     """Validate if item type transition is allowed"""
     return current_type != new_type
 
 
+# Allowed next statuses for each claim status
+_CLAIM_TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "pending": frozenset(("approved", "rejected")),
+    "approved": frozenset(("completed",)),
+    "rejected": frozenset(),
+    "completed": frozenset(),
+}
+
+
 def validate_claim_status_transition(current_status: str, new_status: str) -> bool:
     """Validate if claim status transition is allowed"""
-    valid_transitions = {
-        "pending": ["approved", "rejected"],
-        "approved": ["completed"],
-        "rejected": [],
-        "completed": []
-    }
-    return new_status in valid_transitions.get(current_status, [])
+    return new_status in _CLAIM_TRANSITIONS.get(current_status, frozenset())
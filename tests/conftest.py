@@ -1,32 +1,37 @@
-import os
-import pathlib
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, Session, create_engine
 
 from app.main import app
+from app import cache
 import app.database as db_module
 
-TEST_DB_PATH = pathlib.Path("./test.db")
-TEST_DATABASE_URL = f"sqlite:///{TEST_DB_PATH.as_posix()}"
+# In-memory SQLite: nothing is written to disk. StaticPool hands every
+# session the same single connection, so they all see the same database.
+TEST_DATABASE_URL = "sqlite://"
 
 # Create a separate SQLite engine for tests
 engine = create_engine(
     TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
 )
 
-# Ensure metadata uses the test engine
-SQLModel.metadata.create_all(engine)
 
+# pysqlite opens and commits transactions on its own, which breaks SAVEPOINTs;
+# turn that off and let SQLAlchemy emit BEGIN itself
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
 
-def override_get_session():
-    with Session(engine) as session:
-        yield session
+
+@event.listens_for(engine, "begin")
+def _emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
 
 
-# Override the app's DB engine and dependency before tests
-app.dependency_overrides[db_module.get_session] = override_get_session
 # Point the module-level engine to the test engine so startup hooks use it
 db_module.engine = engine
 
@@ -35,22 +40,54 @@ db_module.engine = engine
 def setup_and_teardown_db():
     SQLModel.metadata.create_all(engine)
     yield
-    # Teardown: close connections and remove DB file
-    try:
-        # Best-effort cleanup
-        if TEST_DB_PATH.exists():
-            TEST_DB_PATH.unlink()
-    except Exception:
-        pass
+    engine.dispose()
 
 
 @pytest.fixture(autouse=True)
 def clean_db_between_tests():
-    SQLModel.metadata.drop_all(engine)
-    SQLModel.metadata.create_all(engine)
-    yield
+    """
+    Run each test inside a transaction that is rolled back afterwards.
 
+    Sessions join it with SAVEPOINTs, so commit()/rollback() in the app only
+    affect the savepoint and nothing outlives the test.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
 
-@pytest.fixture()
+    def override_get_session():
+        with Session(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        ) as session:
+            yield session
+
+    app.dependency_overrides[db_module.get_session] = override_get_session
+    # Code that opens Session(database.engine) itself (background tasks) joins
+    # the test's transaction too
+    db_module.engine = connection
+    cache.clear_all()
+    yield connection
+    db_module.engine = engine
+    app.dependency_overrides.pop(db_module.get_session, None)
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(scope="session")
 def client():
-    return TestClient(app) 
\ No newline at end of file
+    # One client (and one app startup) for the whole run; per-test isolation
+    # comes from clean_db_between_tests
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture()
+def session(clean_db_between_tests):
+    """A session inside the current test's transaction, for calling crud directly."""
+    with Session(
+        bind=clean_db_between_tests,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ) as test_session:
+        yield test_session
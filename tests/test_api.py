@@ -1,9 +1,14 @@
+import io
 import os
 from datetime import date, timedelta
 from typing import Dict, Any
 
+from fastapi import UploadFile
 from fastapi.testclient import TestClient
 
+from app import crud, schemas
+from app.routes import items as item_routes
+
 
 def register_user(client: TestClient, name: str, email: str, password: str, role: str = "user") -> Dict[str, Any]:
     payload = {"name": name, "email": email, "password": password, "role": role}
@@ -26,6 +31,13 @@ def test_auth_register_and_login_flow(client: TestClient):
     user = register_user(client, "Alice", "alice@example.com", "password123")
     assert user["email"] == "alice@example.com"
 
+    # Duplicate email is rejected
+    r = client.post("/auth/register", json={"name": "Alice", "email": "alice@example.com", "password": "password123"})
+    assert r.status_code == 400
+
+    r = client.post("/auth/register", json={"name": "Alice", "email": "not-an-email", "password": "password123"})
+    assert r.status_code == 422
+
     token = login_user(client, "alice@example.com", "password123")
     assert isinstance(token, str) and len(token) > 10
 
@@ -64,17 +76,47 @@ def test_items_crud_and_filters(client: TestClient):
     assert r.status_code == 200, r.text
     item2 = r.json()
 
+    # Uploads are checked by content, not just extension
+    fake_image = {"image": ("wallet.png", b"not really a png", "image/png")}
+    r = client.post("/items/", headers=auth_headers(user_token), data=data, files=fake_image)
+    assert r.status_code == 400
+
+    empty_image = {"image": ("wallet.png", b"", "image/png")}
+    r = client.post("/items/", headers=auth_headers(user_token), data=data, files=empty_image)
+    assert r.status_code == 400
+
     # List all
     r = client.get("/items/", headers=auth_headers(user_token))
     assert r.status_code == 200
     items = r.json()
     assert len(items) >= 2
 
+    # Cursor pagination walks every item exactly once
+    seen, cursor = [], None
+    for _ in range(3):
+        r = client.get("/items/", headers=auth_headers(user_token), params={"limit": 1, "cursor": cursor})
+        assert r.status_code == 200
+        seen += [i["id"] for i in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted([item1["id"], item2["id"]])
+
+    # Browsers only let the frontend read the cursor header if CORS exposes it
+    r = client.get("/items/", headers={**auth_headers(user_token), "Origin": "http://localhost:5173"})
+    assert "x-next-cursor" in r.headers["access-control-expose-headers"].lower()
+
+    r = client.get("/items/?cursor=garbage", headers=auth_headers(user_token))
+    assert r.status_code == 400
+
     # Filters
     r = client.get("/items/?item_type=lost", headers=auth_headers(user_token))
     assert r.status_code == 200
     assert all(i["item_type"] == "lost" for i in r.json())
 
+    r = client.get("/items/?item_type=bogus", headers=auth_headers(user_token))
+    assert r.status_code == 422
+
     r = client.get("/items/?location=lib", headers=auth_headers(user_token))
     assert r.status_code == 200
     assert any("Library" in i["location"] for i in r.json())
@@ -92,11 +134,24 @@ def test_items_crud_and_filters(client: TestClient):
     # Admin can update; ensure allowed
     assert r.status_code == 200
 
+    # Listings reflect the update (cached pages are invalidated on write)
+    r = client.get("/items/?item_type=lost", headers=auth_headers(user_token))
+    assert r.status_code == 200
+    assert r.json()[0]["description"] == "Black leather wallet with ID"
+
     # Owner-only filter
     r = client.get("/items/?owner_only=true", headers=auth_headers(user_token))
     assert r.status_code == 200
     assert all(i["owner_id"] == user["id"] for i in r.json())
 
+    # Statistics
+    r = client.get("/items/stats", headers=auth_headers(user_token))
+    assert r.status_code == 200
+    stats = r.json()
+    assert stats["total_items"] == 2
+    assert stats["lost_items"] == 1 and stats["found_items"] == 1
+    assert stats["active_items"] == 2 and stats["recent_items_30_days"] == 2
+
 
 def test_claims_flow(client: TestClient):
     # Users
@@ -135,6 +190,15 @@ def test_claims_flow(client: TestClient):
     r = client.post("/claims/", headers=auth_headers(owner_token), json=claim_payload)
     assert r.status_code == 400
 
+    # Claimer and item owner both see the claim in their listing
+    for token in (claimer_token, owner_token):
+        r = client.get("/claims/", headers=auth_headers(token))
+        assert r.status_code == 200
+        assert [c["id"] for c in r.json()] == [claim["id"]]
+
+    r = client.get("/claims/?status_filter=approved", headers=auth_headers(claimer_token))
+    assert r.status_code == 200 and r.json() == []
+
     # Owner/admin can view claims for the item
     r = client.get(f"/claims/item/{item['id']}", headers=auth_headers(owner_token))
     assert r.status_code == 200 and len(r.json()) >= 1
@@ -155,10 +219,197 @@ def test_claims_flow(client: TestClient):
     r = client.put(f"/claims/{claim['id']}/status", headers=auth_headers(owner_token), json=status_update)
     assert r.status_code == 200 and r.json()["status"] in ("approved", "pending", "rejected", "completed")
 
+    # Cached listings are invalidated by the status change
+    r = client.get("/claims/?status_filter=approved", headers=auth_headers(claimer_token))
+    assert r.status_code == 200 and [c["id"] for c in r.json()] == [claim["id"]]
+
     # Claimer should not be able to update own claim
     r = client.put(f"/claims/{claim['id']}/status", headers=auth_headers(claimer_token), json=status_update)
     assert r.status_code in (400, 403)
 
     # Delete claim by admin
     r = client.delete(f"/claims/{claim['id']}", headers=auth_headers(admin_token))
-    assert r.status_code == 200 
\ No newline at end of file
+    assert r.status_code == 200 
+
+def test_item_image_revalidation(client: TestClient):
+    register_user(client, "Erin", "erin@example.com", "pass111")
+    token = login_user(client, "erin@example.com", "pass111")
+
+    data = {
+        "name": "Lost Umbrella",
+        "description": "Blue folding umbrella",
+        "item_type": "lost",
+        "location": "Gym",
+        "date": date.today().isoformat(),
+    }
+    first = {"image": ("umbrella.png", b"\x89PNG\r\n\x1a\n first", "image/png")}
+    r = client.post("/items/", headers=auth_headers(token), data=data, files=first)
+    assert r.status_code == 200, r.text
+    item = r.json()
+
+    r = client.get(f"/items/{item['id']}/image")
+    assert r.status_code == 200
+    assert "immutable" not in r.headers["cache-control"]
+    etag = r.headers["etag"]
+
+    r = client.get(f"/items/{item['id']}/image", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    # Replacing the image changes what the same URL serves
+    second = {"image": ("umbrella.png", b"\x89PNG\r\n\x1a\n second", "image/png")}
+    r = client.put(f"/items/{item['id']}/image", headers=auth_headers(token), files=second)
+    assert r.status_code == 200, r.text
+
+    r = client.get(f"/items/{item['id']}/image", headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    assert r.content.endswith(b"second")
+
+    r = client.delete(f"/items/{item['id']}", headers=auth_headers(token))
+    assert r.status_code == 200
+
+
+def test_shared_image_kept_until_last_item_deleted(client: TestClient):
+    register_user(client, "Finn", "finn@example.com", "pass222")
+    token = login_user(client, "finn@example.com", "pass222")
+
+    data = {
+        "name": "Lost Scarf",
+        "description": "Red wool scarf",
+        "item_type": "lost",
+        "location": "Bus stop",
+        "date": date.today().isoformat(),
+    }
+    png = b"\x89PNG\r\n\x1a\n same bytes"
+    ids, paths = [], set()
+    for _ in range(2):
+        r = client.post("/items/", headers=auth_headers(token), data=data, files={"image": ("scarf.png", png, "image/png")})
+        assert r.status_code == 200, r.text
+        ids.append(r.json()["id"])
+        paths.add(r.json()["image_url"])
+
+    # Identical uploads share one stored file
+    assert len(paths) == 1
+    path = paths.pop()
+
+    r = client.delete(f"/items/{ids[0]}", headers=auth_headers(token))
+    assert r.status_code == 200
+    assert os.path.exists(path)
+    r = client.get(f"/items/{ids[1]}/image")
+    assert r.status_code == 200 and r.content == png
+
+    r = client.delete(f"/items/{ids[1]}", headers=auth_headers(token))
+    assert r.status_code == 200
+    assert not os.path.exists(path)
+
+
+def test_search_similar_items(client: TestClient, session):
+    register_user(client, "Gina", "gina@example.com", "pass333")
+    token = login_user(client, "gina@example.com", "pass333")
+
+    def create(name: str, description: str, item_type: str) -> int:
+        data = {
+            "name": name,
+            "description": description,
+            "item_type": item_type,
+            "location": "Library",
+            "date": date.today().isoformat(),
+        }
+        r = client.post("/items/", headers=auth_headers(token), data=data)
+        assert r.status_code == 200, r.text
+        return r.json()["id"]
+
+    reference = create("Black wallet", "Leather 100% wallet", "lost")
+    match = create("Black wallet", "Found leather 100% wallet", "found")
+    create("Red umbrella", "Folding umbrella", "found")
+    create("Black wallet", "Leather wallet", "lost")  # same type, never a match
+
+    similar = crud.search_similar_items(session, reference, similarity_threshold=0.5)
+    assert [item.id for item in similar] == [match]
+
+    assert crud.search_similar_items(session, 999999) == []
+
+
+def test_image_delete_interleaved_with_upload_of_same_bytes(client: TestClient, session):
+    user = register_user(client, "Hana", "hana@example.com", "pass444")
+    token = login_user(client, "hana@example.com", "pass444")
+
+    data = {
+        "name": "Lost Mug",
+        "description": "White ceramic mug",
+        "item_type": "lost",
+        "location": "Kitchen",
+        "date": date.today().isoformat(),
+    }
+    png = b"\x89PNG\r\n\x1a\n mug"
+
+    def upload(name: str):
+        return item_routes.stage_uploaded_file(UploadFile(file=io.BytesIO(png), filename=name))
+
+    def commit_item(image_path: str) -> int:
+        item = crud.create_item(session, schemas.ItemCreate(**data, image_url=image_path), owner_id=user["id"])
+        return item.id
+
+    r = client.post("/items/", headers=auth_headers(token), data=data, files={"image": ("mug.png", png, "image/png")})
+    assert r.status_code == 200, r.text
+    first = r.json()
+    path = first["image_url"]
+
+    # An upload of the same bytes is staged, then the only item using the file
+    # is deleted and its cleanup runs before the upload's row commits
+    image_path, staged = upload("mug.png")
+    assert image_path == path
+    r = client.delete(f"/items/{first['id']}", headers=auth_headers(token))
+    assert r.status_code == 200
+    assert not os.path.exists(path)
+
+    second_id = commit_item(image_path)
+    item_routes.publish_image(image_path, staged)
+    r = client.get(f"/items/{second_id}/image")
+    assert r.status_code == 200 and r.content == png
+
+    # The upload's row commits after the delete's first check but before the
+    # cleanup re-checks: the file is put back
+    image_path, staged = upload("mug.png")
+    third_id = commit_item(image_path)
+    crud.delete_item(session, crud.get_item_by_id(session, second_id))
+    item_routes.remove_image_if_still_unused(path)
+    assert os.path.exists(path)
+    item_routes.publish_image(image_path, staged)
+
+    r = client.delete(f"/items/{third_id}", headers=auth_headers(token))
+    assert r.status_code == 200
+    assert not os.path.exists(path)
+    assert [f for f in os.listdir(item_routes.UPLOAD_DIR) if f.endswith((".part", ".trash"))] == []
+
+
+def test_item_image_existence_cache_is_not_trusted_blindly(client: TestClient):
+    register_user(client, "Ivan", "ivan@example.com", "pass555")
+    token = login_user(client, "ivan@example.com", "pass555")
+
+    data = {
+        "name": "Lost Hat",
+        "description": "Green beanie",
+        "item_type": "lost",
+        "location": "Park",
+        "date": date.today().isoformat(),
+    }
+    png = b"\x89PNG\r\n\x1a\n hat"
+    r = client.post("/items/", headers=auth_headers(token), data=data, files={"image": ("hat.png", png, "image/png")})
+    assert r.status_code == 200, r.text
+    item = r.json()
+    path = item["image_url"]
+
+    # A stale "missing" entry (e.g. from before the same bytes were re-uploaded)
+    # does not hide a file that is on disk
+    item_routes.image_exists_cache.set(path, False)
+    r = client.get(f"/items/{item['id']}/image")
+    assert r.status_code == 200 and r.content == png
+
+    # A stale "present" entry (file removed by another worker) is a 404, not a 500
+    os.remove(path)
+    r = client.get(f"/items/{item['id']}/image")
+    assert r.status_code == 404
+
+    r = client.delete(f"/items/{item['id']}", headers=auth_headers(token))
+    assert r.status_code == 200
+